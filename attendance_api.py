@@ -5,25 +5,255 @@ Provides REST API endpoints to connect with Laravel backend.
 Serves attendance analysis data and integrates with the database.
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import Any, Callable, List, Optional, Dict
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+import asyncio
+import functools
+import hashlib
+import hmac
+import json
 import logging
+import os
+import time
+import uuid
 
-from attendance_analysis import AttendanceAnalyzer
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+from attendance_analysis import DEFAULT_EWMA_SPAN, DEFAULT_ROLLING_DAYS, AttendanceAnalyzer, LazyModule
+from attendance_metrics import SamplingProfiler, registry, stage_timer
+from attendance_policy import DEFAULT_POLICY_NAME, load_policies
+from attendance_scheduler import PrecomputeScheduler
+
+# Loaded on first use so the app starts without importing them
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def json_default(value: Any) -> Any:
+    """Convert NumPy and pandas values the JSON encoder does not handle natively"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(content: Any) -> bytes:
+    """Serialize to JSON bytes with orjson when available, else the standard library"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        content, default=json_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class AnalysisJSONResponse(JSONResponse):
+    """
+    JSON response that serializes NumPy and pandas values natively.
+    
+    Endpoints return this directly so FastAPI skips jsonable_encoder, which
+    walks every nested dict in Python and is the slow part for whole-cohort
+    responses.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        with JSON_ENCODE_TIMER:
+            return dumps_json(content)
+
+
+# Encoding time of JSON response bodies, next to the analyzer's stages
+JSON_ENCODE_TIMER = stage_timer("json_encode")
+
+REQUEST_SECONDS = registry.histogram(
+    "attendance_api_request_seconds", "HTTP request latency per endpoint", ["method", "endpoint", "status"]
+)
+
+# Sampling profiles of single requests, taken when a request carries an
+# X-Profile header. Off unless ANALYSIS_PROFILING=true, since profiles
+# expose source paths and function names.
+PROFILING_ENABLED = os.getenv("ANALYSIS_PROFILING", "false").lower() == "true"
+PROFILE_INTERVAL = float(os.getenv("ANALYSIS_PROFILE_INTERVAL", "0.005"))
+PROFILE_HISTORY = 20
+profiles: "OrderedDict[str, SamplingProfiler]" = OrderedDict()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-endpoint latency and optional profiles.
+    
+    Requests are labelled by route template (e.g.
+    /api/students/{student_id}/analysis) rather than the raw path, so
+    student IDs do not become separate series.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = [500]
+        profiler = profile_id = None
+        if PROFILING_ENABLED and dict(scope["headers"]).get(b"x-profile", b"").lower() in (b"1", b"true"):
+            profiler = SamplingProfiler(interval=PROFILE_INTERVAL).start()
+            profile_id = uuid.uuid4().hex[:16]
+        
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if profile_id is not None:
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                endpoint=getattr(route, "path", "unmatched"),
+                status=status[0]
+            )
+            if profiler is not None:
+                profiles[profile_id] = profiler.stop()
+                while len(profiles) > PROFILE_HISTORY:
+                    profiles.popitem(last=False)
+
+
+# Seconds a client may reuse an analysis response before revalidating it
+# with If-None-Match (0: revalidate on every use)
+CACHE_MAX_AGE = int(os.getenv("ANALYSIS_CACHE_MAX_AGE", "0"))
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Build the validator and Cache-Control headers of a cacheable response"""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={CACHE_MAX_AGE}, must-revalidate"
+    }
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match covers the current ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """304 response telling the client its cached copy is still current"""
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+# Shared secret the Laravel backend sends in X-Analysis-Secret to the
+# webhook and refresh endpoints (unset: those endpoints reject every call)
+WEBHOOK_SECRET = os.getenv("ANALYSIS_WEBHOOK_SECRET", "")
+
+
+def require_webhook_secret(x_analysis_secret: Optional[str] = Header(None)) -> None:
+    """Reject maintenance calls without the shared ANALYSIS_WEBHOOK_SECRET"""
+    if not WEBHOOK_SECRET:
+        raise HTTPException(status_code=403, detail="ANALYSIS_WEBHOOK_SECRET is not configured")
+    if not x_analysis_secret or not hmac.compare_digest(x_analysis_secret.encode(), WEBHOOK_SECRET.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Analysis-Secret header")
+
+
+# Largest number of students accepted by one batch analysis request
+MAX_BATCH_SIZE = int(os.getenv("ANALYSIS_MAX_BATCH_SIZE", "1000"))
+
+
+# Bounded pool for blocking pandas/SQLAlchemy work, so a slow cohort
+# analysis never stalls the event loop (and /health keeps answering).
+# Each analyzer call runs against one immutable snapshot, so requests can
+# be served concurrently.
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+
+async def run_analysis(func: Callable, *args, **kwargs):
+    """Run a blocking analyzer call on the analysis thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(analysis_executor, functools.partial(func, *args, **kwargs))
+
+
+# Opt-in background precomputation of the risk summary
+# (ANALYSIS_PRECOMPUTE=true; by default it is computed per request). It
+# adds database load to every API worker even when nothing reads the
+# summary: changes are probed every PROBE_INTERVAL seconds and debounced
+# for DEBOUNCE seconds (at most MAX_DELAY), and the summary is refreshed
+# every INTERVAL seconds anyway.
+PRECOMPUTE_ENABLED = os.getenv("ANALYSIS_PRECOMPUTE", "false").lower() == "true"
+PRECOMPUTE_INTERVAL = float(os.getenv("ANALYSIS_PRECOMPUTE_INTERVAL", "300"))
+PRECOMPUTE_PROBE_INTERVAL = float(os.getenv("ANALYSIS_PRECOMPUTE_PROBE_INTERVAL", "5"))
+PRECOMPUTE_DEBOUNCE = float(os.getenv("ANALYSIS_PRECOMPUTE_DEBOUNCE", "2"))
+PRECOMPUTE_MAX_DELAY = float(os.getenv("ANALYSIS_PRECOMPUTE_MAX_DELAY", "30"))
+
+
+def compute_risk_summary():
+    """Compute the risk summary from fresh data, with the ETag of its snapshot"""
+    with stage_timer("precompute_risk_summary"):
+        analyzer.notify_change()
+        snapshot = analyzer.get_snapshot()
+        return snapshot.data_version, (f'"{snapshot.etag}"', analyzer.get_risk_summary(snapshot))
+
+
+risk_summary_scheduler = PrecomputeScheduler(
+    compute_risk_summary,
+    lambda: analyzer.data_version(),
+    run_analysis,
+    interval=PRECOMPUTE_INTERVAL,
+    probe_interval=PRECOMPUTE_PROBE_INTERVAL,
+    debounce=PRECOMPUTE_DEBOUNCE,
+    max_delay=PRECOMPUTE_MAX_DELAY,
+    name="risk-summary"
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the precompute scheduler and shut the analysis pools down with the app"""
+    if PRECOMPUTE_ENABLED:
+        risk_summary_scheduler.start()
+    yield
+    await risk_summary_scheduler.stop()
+    analysis_executor.shutdown(wait=False, cancel_futures=True)
+    analyzer.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Attendance Analysis API",
     description="AI-powered attendance pattern analysis API for OJT Attendance Tracker",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=AnalysisJSONResponse
 )
 
 # Add CORS middleware for Laravel frontend communication
@@ -33,10 +263,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Profile-Id"],
+)
+app.add_middleware(MetricsMiddleware)
+
+# Initialize analyzer (ANALYSIS_MATERIALIZE=true keeps per-student results
+# precomputed and maintained as attendance rows change;
+# ANALYSIS_PARALLEL_WORKERS > 0 analyzes large cohorts across that many
+# worker processes; ANALYSIS_RISK_POLICIES names a JSON file of risk
+# policies and ANALYSIS_RISK_POLICY the one the analysis applies)
+analyzer = AttendanceAnalyzer(
+    materialize=os.getenv("ANALYSIS_MATERIALIZE", "false").lower() == "true",
+    parallel_workers=int(os.getenv("ANALYSIS_PARALLEL_WORKERS", "0")),
+    policies=load_policies(os.getenv("ANALYSIS_RISK_POLICIES")),
+    policy=os.getenv("ANALYSIS_RISK_POLICY", DEFAULT_POLICY_NAME)
 )
 
-# Initialize analyzer
-analyzer = AttendanceAnalyzer()
+
+def cache_metrics():
+    """Scrape-time samples of the analyzer's snapshot cache counters"""
+    stats = analyzer.cache_stats()
+    yield "attendance_analysis_cache_hits_total", "counter", "Snapshot cache hits", stats["hits"]
+    yield "attendance_analysis_cache_misses_total", "counter", "Snapshot cache misses (reloads)", stats["misses"]
+    yield "attendance_analysis_cache_probes_total", "counter", "Data version probes", stats["probes"]
+    yield "attendance_analysis_delta_loads_total", "counter", "Incremental attendance loads", stats["delta_loads"]
+    yield "attendance_analysis_reconciliations_total", "counter", "Attendance ID reconciliations", stats["reconciliations"]
+    yield "attendance_analysis_cache_hit_ratio", "gauge", "Share of snapshot lookups served from cache", stats["hit_rate"] / 100
+    yield "attendance_analysis_snapshot_version", "gauge", "Version of the current snapshot", stats["snapshot_version"] or 0
+
+
+registry.register_collector(cache_metrics)
 
 
 # Pydantic Models for request/response validation
@@ -56,6 +312,37 @@ class RiskSummaryResponse(BaseModel):
     total_students: int
     risk_distribution: Dict
     critical_students: List[Dict]
+    computed_at: Optional[str] = None
+    age_seconds: Optional[float] = None
+    stale: Optional[bool] = None
+
+
+class StudentBatchRequest(BaseModel):
+    """Request body for batch student analysis"""
+    student_ids: List[str]
+
+
+class AttendanceChangeEvent(BaseModel):
+    """Notification pushed by the Laravel backend when attendance changes"""
+    event: str
+    attendance_id: Optional[str] = None
+    student_id: Optional[str] = None
+
+
+async def response_etag(*variants: Any, fresh: bool = False) -> str:
+    """
+    Get the ETag of a response computed from the current data.
+    
+    Args:
+        variants: Anything besides the data the response depends on
+            (e.g. today's date for relative time windows)
+        fresh: Probe the database instead of trusting the cached snapshot,
+            for responses read live from it (backend=sql)
+    """
+    etag = await run_analysis(analyzer.data_etag, fresh)
+    if variants:
+        etag = hashlib.sha1(repr((etag, *variants)).encode()).hexdigest()[:20]
+    return f'"{etag}"'
 
 
 # Health check endpoint
@@ -76,7 +363,7 @@ async def health_check():
 
 # Attendance Analysis Endpoints
 @app.get("/api/students/{student_id}/analysis", tags=["Analysis"], response_model=StudentAnalysisResponse)
-async def get_student_analysis(student_id: str):
+async def get_student_analysis(student_id: str, request: Request):
     """
     Get comprehensive analysis for a specific student.
     
@@ -90,12 +377,16 @@ async def get_student_analysis(student_id: str):
         HTTPException: If student not found or analysis fails
     """
     try:
-        analysis = analyzer.get_student_analysis(student_id)
+        etag = await response_etag()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        analysis = await run_analysis(analyzer.get_student_analysis, student_id)
         
         if 'error' in analysis:
             raise HTTPException(status_code=422, detail=analysis['error'])
         
-        return analysis
+        return AnalysisJSONResponse(analysis, headers=cache_headers(etag))
     
     except Exception as e:
         logger.error(f"Error analyzing student {student_id}: {str(e)}")
@@ -103,118 +394,530 @@ async def get_student_analysis(student_id: str):
 
 
 @app.get("/api/students/{student_id}/summary", tags=["Analysis"])
-async def get_student_summary(student_id: str):
+async def get_student_summary(
+    student_id: str,
+    request: Request,
+    backend: str = Query("pandas", pattern="^(pandas|sql)$", description="Aggregate in pandas or push down to SQL")
+):
     """
     Get quick attendance summary for a specific student.
     
     Args:
         student_id: UUID of the student
+        backend: pandas (cached snapshot) or sql (GROUP BY pushdown)
         
     Returns:
         dict: Attendance counts and rates
     """
     try:
-        summary = analyzer.get_student_attendance_summary(student_id)
-        return {
+        etag = await response_etag(fresh=backend == "sql")
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        summary = await run_analysis(analyzer.get_student_attendance_summary, student_id, backend)
+        return AnalysisJSONResponse({
             "status": "success",
             "data": summary
-        }
+        }, headers=cache_headers(etag))
     except Exception as e:
         logger.error(f"Error getting summary for student {student_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting summary: {str(e)}")
 
 
+@app.get("/api/students/{student_id}/analysis/windowed", tags=["Analysis"])
+async def get_student_windowed_analysis(
+    student_id: str,
+    time_period: Optional[str] = Query(None, pattern="^(week|month|all)$", description="Time period: week, month, all"),
+    start_date: Optional[date] = Query(None, description="Inclusive start of a custom window"),
+    end_date: Optional[date] = Query(None, description="Inclusive end of the window (default: today)"),
+    last_days: Optional[int] = Query(None, ge=1, description="Window of the last N days"),
+    rolling_days: int = Query(DEFAULT_ROLLING_DAYS, ge=1, description="Days in the rolling attendance rate"),
+    ewma_span: int = Query(DEFAULT_EWMA_SPAN, ge=1, description="Span, in records, of the EWMA trend")
+):
+    """
+    Get a student's attendance analysis within a time window.
+    
+    Args:
+        student_id: UUID of the student
+        time_period, start_date, end_date, last_days: Window selection
+        rolling_days: Calendar days in the rolling attendance rate
+        ewma_span: Span of the exponentially weighted attendance rate
+        
+    Returns:
+        dict: Window rate, rolling and EWMA rates, trend, streaks and the
+        daily rate series
+    """
+    try:
+        analysis = await run_analysis(
+            analyzer.get_student_windowed_analysis, student_id, time_period,
+            start_date, end_date, last_days, rolling_days, ewma_span
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting windowed analysis for student {student_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting windowed analysis: {str(e)}")
+    
+    if 'error' in analysis:
+        raise HTTPException(status_code=404, detail=analysis['error'])
+    return AnalysisJSONResponse({
+        "status": "success",
+        "data": analysis
+    })
+
+
 @app.get("/api/risk-summary", tags=["Analysis"], response_model=RiskSummaryResponse)
-async def get_risk_summary():
+async def get_risk_summary(
+    request: Request,
+    policy: Optional[List[str]] = Query(None, description="Risk policies to preview side by side (repeat or comma-separate)")
+):
     """
     Get risk classification summary for all students.
     
+    While the precompute scheduler runs, the last completed summary is
+    returned without touching the database. computed_at and age_seconds
+    tell when it was computed; stale is true when a data change is known
+    that it does not include yet (it is recomputed once writes settle).
+    
+    With policy, the cohort is instead reclassified under each named risk
+    policy and the summaries are returned side by side, keyed by policy.
+    
+    Args:
+        policy: Optional risk policy names to preview
+        
     Returns:
         RiskSummaryResponse: Distribution of students by risk level and critical students list
     """
+    if policy:
+        names = [name.strip() for value in policy for name in value.split(",") if name.strip()]
+        try:
+            etag = await response_etag(names)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            
+            preview = await run_analysis(analyzer.get_policy_risk_summaries, names)
+            return AnalysisJSONResponse(preview, headers=cache_headers(etag))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error previewing risk policies: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error previewing risk policies: {str(e)}")
+    
     try:
-        summary = analyzer.get_risk_summary()
-        return summary
+        if risk_summary_scheduler.running:
+            etag, summary = await risk_summary_scheduler.get()
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            return AnalysisJSONResponse(
+                {**summary, **risk_summary_scheduler.status()}, headers=cache_headers(etag)
+            )
+        
+        etag = await response_etag()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        summary = await run_analysis(analyzer.get_risk_summary)
+        return AnalysisJSONResponse(summary, headers=cache_headers(etag))
     except Exception as e:
         logger.error(f"Error getting risk summary: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting risk summary: {str(e)}")
 
 
+def select_fields(analysis: Dict, fields: List[str]) -> Dict:
+    """
+    Keep only the requested fields of an analysis dictionary.
+    
+    Fields may be nested with dots, e.g. "summary.attendance_rate".
+    Error entries are returned unchanged.
+    """
+    if 'error' in analysis:
+        return analysis
+    
+    selected = {}
+    for field in fields:
+        source, target = analysis, selected
+        *parents, leaf = field.split('.')
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+            target = target.setdefault(key, {})
+        if isinstance(source, dict) and leaf in source:
+            target[leaf] = source[leaf]
+    return selected
+
+
+async def stream_analysis_ndjson(cursor: Optional[str], limit: Optional[int], fields: Optional[List[str]]):
+    """Yield the cohort analysis as NDJSON, computing one batch at a time on the analysis pool"""
+    batches = await run_analysis(analyzer.iter_students_analysis, cursor, limit)
+    while True:
+        batch = await run_analysis(next, batches, None)
+        if batch is None:
+            break
+        yield b"".join(
+            dumps_json(select_fields(analysis, fields) if fields else analysis) + b"\n"
+            for analysis in batch
+        )
+
+
 @app.get("/api/students/analysis/all", tags=["Analysis"])
-async def get_all_students_analysis():
+async def get_all_students_analysis(
+    cursor: Optional[str] = Query(None, description="Student id the previous page ended at"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of students to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. student_id,risk_classification,summary.attendance_rate"),
+    stream: bool = Query(False, description="Stream one analysis per line as NDJSON")
+):
     """
     Get analysis for all students.
     
+    Args:
+        cursor: Optional cursor from a previous page's next_cursor
+        limit: Optional page size; results are ordered by student id
+        fields: Optional field selector applied to each analysis
+        stream: Stream results as application/x-ndjson instead of one JSON body
+        
     Returns:
-        dict: List of analysis for all students
+        dict: List of analysis for all students (or an NDJSON stream)
     """
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    
+    if stream:
+        return StreamingResponse(
+            stream_analysis_ndjson(cursor, limit, selected),
+            media_type="application/x-ndjson"
+        )
+    
     try:
-        all_analysis = analyzer.get_all_students_analysis()
-        return {
+        if cursor is None and limit is None:
+            all_analysis = await run_analysis(analyzer.get_all_students_analysis)
+            page = {"total_students": len(all_analysis), "data": all_analysis}
+        else:
+            page = await run_analysis(analyzer.get_students_analysis_page, cursor, limit)
+        
+        if selected:
+            page["data"] = [select_fields(analysis, selected) for analysis in page["data"]]
+        
+        return AnalysisJSONResponse({
             "status": "success",
-            "total_students": len(all_analysis),
-            "data": all_analysis
-        }
+            **page
+        })
     except Exception as e:
         logger.error(f"Error getting all analyses: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting analyses: {str(e)}")
 
 
-@app.get("/api/statistics", tags=["Statistics"])
-async def get_statistics(time_period: Optional[str] = Query(None, description="Time period: week, month, all")):
+@app.post("/api/students/analysis/batch", tags=["Analysis"])
+async def get_students_analysis_batch(request: StudentBatchRequest):
     """
-    Get overall attendance statistics.
+    Get analysis for a list of students in one request.
+    
+    All students are analyzed against the same data snapshot. Students
+    that cannot be analyzed (not found, insufficient data) get an error
+    entry instead of failing the whole batch.
     
     Args:
-        time_period: Optional filter for time period (week, month, all)
+        request: Body with the student_ids to analyze
+        
+    Returns:
+        dict: One result per distinct student ID, in request order
+    """
+    if not request.student_ids:
+        raise HTTPException(status_code=422, detail="student_ids must not be empty")
+    if len(request.student_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_SIZE} student_ids per batch")
+    
+    try:
+        results = await run_analysis(analyzer.get_students_analysis, request.student_ids)
+        failed = sum(1 for result in results if 'error' in result)
+        
+        return AnalysisJSONResponse({
+            "status": "success",
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "data": results
+        })
+    except Exception as e:
+        logger.error(f"Error getting batch analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting batch analysis: {str(e)}")
+
+
+@app.get("/api/students/analysis/windowed", tags=["Analysis"])
+async def get_windowed_analysis(
+    time_period: Optional[str] = Query(None, pattern="^(week|month|all)$", description="Time period: week, month, all"),
+    start_date: Optional[date] = Query(None, description="Inclusive start of a custom window"),
+    end_date: Optional[date] = Query(None, description="Inclusive end of the window (default: today)"),
+    last_days: Optional[int] = Query(None, ge=1, description="Window of the last N days"),
+    rolling_days: int = Query(DEFAULT_ROLLING_DAYS, ge=1, description="Days in the rolling attendance rate"),
+    ewma_span: int = Query(DEFAULT_EWMA_SPAN, ge=1, description="Span, in records, of the EWMA trend")
+):
+    """
+    Get every student's attendance analysis within a time window.
+    
+    Args:
+        time_period, start_date, end_date, last_days: Window selection
+        rolling_days: Calendar days in the rolling attendance rate
+        ewma_span: Span of the exponentially weighted attendance rate
         
     Returns:
-        dict: Overall statistics
+        dict: Cohort totals and per-student windowed metrics
     """
     try:
-        analyzer.load_data()
+        analysis = await run_analysis(
+            analyzer.get_windowed_analysis, time_period,
+            start_date, end_date, last_days, rolling_days, ewma_span
+        )
+        return AnalysisJSONResponse({
+            "status": "success",
+            **analysis
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting windowed analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting windowed analysis: {str(e)}")
+
+
+@app.get("/api/students/analysis/punctuality", tags=["Analysis"])
+async def get_punctuality_analysis(
+    time_period: Optional[str] = Query(None, pattern="^(week|month|all)$", description="Time period: week, month, all"),
+    start_date: Optional[date] = Query(None, description="Inclusive start of a custom window"),
+    end_date: Optional[date] = Query(None, description="Inclusive end of the window (default: today)"),
+    last_days: Optional[int] = Query(None, ge=1, description="Window of the last N days")
+):
+    """
+    Get shift-aware punctuality metrics for every student.
+    
+    Args:
+        time_period, start_date, end_date, last_days: Window selection
         
-        attendances_df = analyzer.attendances_df
-        students_df = analyzer.students_df
+    Returns:
+        dict: Cohort minutes-late distribution, early departures and
+        overtime, a per-shift comparison and per-student metrics
+    """
+    try:
+        analysis = await run_analysis(
+            analyzer.get_punctuality_analysis, time_period, start_date, end_date, last_days
+        )
+        return AnalysisJSONResponse({
+            "status": "success",
+            **analysis
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting punctuality analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting punctuality analysis: {str(e)}")
+
+
+@app.get("/api/students/{student_id}/analysis/punctuality", tags=["Analysis"])
+async def get_student_punctuality(
+    student_id: str,
+    time_period: Optional[str] = Query(None, pattern="^(week|month|all)$", description="Time period: week, month, all"),
+    start_date: Optional[date] = Query(None, description="Inclusive start of a custom window"),
+    end_date: Optional[date] = Query(None, description="Inclusive end of the window (default: today)"),
+    last_days: Optional[int] = Query(None, ge=1, description="Window of the last N days")
+):
+    """
+    Get a student's arrival and departure times measured against their shift.
+    
+    Args:
+        student_id: UUID of the student
+        time_period, start_date, end_date, last_days: Window selection
         
-        total_students = len(students_df)
-        total_attendance_records = len(attendances_df)
+    Returns:
+        dict: Minutes-late statistics and distribution, early departures
+        and overtime
+    """
+    try:
+        analysis = await run_analysis(
+            analyzer.get_student_punctuality, student_id, time_period, start_date, end_date, last_days
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting punctuality for student {student_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting punctuality: {str(e)}")
+    
+    if 'error' in analysis:
+        raise HTTPException(status_code=404, detail=analysis['error'])
+    return AnalysisJSONResponse({
+        "status": "success",
+        "data": analysis
+    })
+
+
+@app.get("/api/students/analysis/forecast", tags=["Analysis"])
+async def get_hours_forecast(
+    request: Request,
+    as_of: Optional[date] = Query(None, description="Date to forecast from (default: today)")
+):
+    """
+    Forecast every student's hours completion.
+    
+    Computed once per data version and as-of date; unchanged data is
+    revalidated with the ETag.
+    
+    Args:
+        as_of: Date to forecast from; only records up to it are used
+        
+    Returns:
+        dict: Status summary and, per student, the projected completion
+        date and the probability of finishing by end_date
+    """
+    try:
+        etag = await response_etag(as_of or date.today())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        forecast = await run_analysis(analyzer.get_hours_forecast, as_of)
+        return AnalysisJSONResponse({
+            "status": "success",
+            **forecast
+        }, headers=cache_headers(etag))
+    except Exception as e:
+        logger.error(f"Error getting hours forecast: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting hours forecast: {str(e)}")
+
+
+@app.get("/api/students/{student_id}/analysis/forecast", tags=["Analysis"])
+async def get_student_hours_forecast(
+    request: Request,
+    student_id: str,
+    as_of: Optional[date] = Query(None, description="Date to forecast from (default: today)")
+):
+    """
+    Forecast a student's hours completion.
+    
+    Args:
+        student_id: UUID of the student
+        as_of: Date to forecast from; only records up to it are used
         
-        # Status breakdown
-        status_breakdown = attendances_df['status'].value_counts().to_dict()
+    Returns:
+        dict: Projected completion date, working days needed and left,
+        and the probability of finishing by end_date
+    """
+    try:
+        etag = await response_etag(as_of or date.today())
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        # Average attendance rate
-        avg_hours = attendances_df['hours_rendered'].mean()
-        total_hours = attendances_df['hours_rendered'].sum()
+        forecast = await run_analysis(analyzer.get_student_hours_forecast, student_id, as_of)
+    except Exception as e:
+        logger.error(f"Error getting hours forecast for student {student_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting hours forecast: {str(e)}")
+    
+    if 'error' in forecast:
+        raise HTTPException(status_code=404, detail=forecast['error'])
+    return AnalysisJSONResponse({
+        "status": "success",
+        "data": forecast
+    }, headers=cache_headers(etag))
+
+
+@app.get("/api/students/analysis/anomalies", tags=["Analysis"])
+async def get_attendance_anomalies(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of anomalies to return"),
+    kind: Optional[str] = Query(None, description="Only anomalies of this kind"),
+    min_score: float = Query(0.0, ge=0, le=1, description="Only anomalies scoring at least this")
+):
+    """
+    Get attendance anomalies across all students, highest score first.
+    
+    Anomalies are scored once per data version; pages are slices of that
+    ranking and unchanged data is revalidated with the ETag.
+    
+    Args:
+        cursor: Optional cursor from a previous page's next_cursor
+        limit: Page size
+        kind: Optional kind: hours_mismatch, absence_cluster,
+            repeated_time_in or weekday_absences
+        min_score: Optional minimum score (0 to 1)
         
-        return {
+    Returns:
+        dict: One page of anomalies with their kind, student, date, score
+        and details, the count of each kind and the next cursor
+    """
+    try:
+        etag = await response_etag(cursor, limit, kind, min_score)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        page = await run_analysis(analyzer.get_anomalies, cursor, limit, kind, min_score)
+        return AnalysisJSONResponse({
+            "status": "success",
+            **page
+        }, headers=cache_headers(etag))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting attendance anomalies: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting attendance anomalies: {str(e)}")
+
+
+@app.get("/api/statistics", tags=["Statistics"])
+async def get_statistics(
+    request: Request,
+    time_period: Optional[str] = Query(None, pattern="^(week|month|all)$", description="Time period: week, month, all"),
+    backend: str = Query("pandas", pattern="^(pandas|sql)$", description="Aggregate in pandas or push down to SQL"),
+    start_date: Optional[date] = Query(None, description="Inclusive start of a custom window"),
+    end_date: Optional[date] = Query(None, description="Inclusive end of the window (default: today)"),
+    last_days: Optional[int] = Query(None, ge=1, description="Window of the last N days")
+):
+    """
+    Get overall attendance statistics.
+    
+    Args:
+        time_period: Optional filter for time period (week, month, all)
+        backend: pandas (cached snapshot) or sql (GROUP BY pushdown)
+        start_date, end_date: Optional custom date range
+        last_days: Optional window of the last N days
+        
+    Returns:
+        dict: Overall statistics for the selected period
+    """
+    try:
+        # Windows ending "today" move with the date even if the data does not
+        relative = end_date is None and (last_days is not None or time_period in ("week", "month"))
+        fresh = backend == "sql"
+        etag = await response_etag(date.today(), fresh=fresh) if relative else await response_etag(fresh=fresh)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        statistics = await run_analysis(
+            analyzer.get_statistics, backend, time_period, start_date, end_date, last_days
+        )
+        
+        return AnalysisJSONResponse({
             "status": "success",
             "data": {
-                "total_students": total_students,
-                "total_attendance_records": total_attendance_records,
-                "status_breakdown": status_breakdown,
-                "average_hours_rendered": round(avg_hours, 2),
-                "total_hours_rendered": round(total_hours, 2),
+                **statistics,
                 "timestamp": datetime.now().isoformat()
             }
-        }
+        }, headers=cache_headers(etag))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting statistics: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting statistics: {str(e)}")
 
 
-@app.post("/api/analysis/refresh", tags=["Maintenance"])
+@app.post("/api/analysis/refresh", tags=["Maintenance"], dependencies=[Depends(require_webhook_secret)])
 async def refresh_analysis():
     """
     Force refresh of analysis data from database.
     
-    Useful when new attendance records are added to the database.
+    Invalidates the analyzer's snapshot cache and reloads both tables.
+    Useful when new attendance records should be visible immediately.
+    Requires the X-Analysis-Secret header.
     
     Returns:
         dict: Status of refresh operation
     """
     try:
-        analyzer.load_data()
+        await run_analysis(analyzer.invalidate_cache)
+        await run_analysis(analyzer.get_snapshot)
+        risk_summary_scheduler.notify()
         return {
             "status": "success",
             "message": "Analysis data refreshed successfully",
@@ -225,8 +928,93 @@ async def refresh_analysis():
         raise HTTPException(status_code=500, detail=f"Error refreshing analysis: {str(e)}")
 
 
+async def apply_attendance_change(event: str) -> None:
+    """Load a notified change in the background (see attendance_changed)"""
+    try:
+        await run_analysis(analyzer.notify_change)
+        await run_analysis(analyzer.get_snapshot)
+    except Exception as e:
+        logger.error(f"Error applying attendance change {event}: {str(e)}")
+
+
+@app.post("/api/webhooks/attendance", tags=["Maintenance"], status_code=202,
+          dependencies=[Depends(require_webhook_secret)])
+async def attendance_changed(change: AttendanceChangeEvent, background_tasks: BackgroundTasks):
+    """
+    Receive an attendance change notification from the Laravel backend.
+    
+    Answers 202 straight away so the attendance write is not held up. The
+    change is then loaded in the background, skipping the remaining cache
+    TTL, and the precompute scheduler is told to refresh the risk summary.
+    
+    Args:
+        change: Event name (created, updated, deleted) and affected IDs
+        
+    Returns:
+        dict: The accepted event
+    """
+    risk_summary_scheduler.notify()
+    background_tasks.add_task(apply_attendance_change, change.event)
+    return {
+        "status": "accepted",
+        "event": change.event
+    }
+
+
+@app.get("/api/analysis/cache", tags=["Maintenance"])
+async def get_cache_stats():
+    """
+    Get snapshot cache hit/miss counters.
+    
+    Returns:
+        dict: Cache hits, misses, change probes and hit rate
+    """
+    return {
+        "status": "success",
+        "data": analyzer.cache_stats()
+    }
+
+
+@app.get("/metrics", tags=["Maintenance"], response_class=Response)
+async def get_metrics():
+    """
+    Get metrics in the Prometheus text exposition format.
+    
+    Includes per-stage analyzer timings, per-endpoint request latencies,
+    rows and bytes loaded from the data source and cache counters.
+    """
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/metrics/profiles/{profile_id}", tags=["Maintenance"], response_class=Response)
+async def get_profile(profile_id: str, top: Optional[int] = Query(None, ge=1, le=200)):
+    """
+    Get the sampling profile of a request sent with an X-Profile header.
+    
+    Args:
+        profile_id: Value of the request's X-Profile-Id response header
+        top: Return the most sampled functions as JSON instead of
+            collapsed stacks
+        
+    Returns:
+        Collapsed stacks (one "outer;inner;leaf count" line per stack,
+        ready for flame graph tools), or the top functions
+    """
+    profiler = profiles.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if top is not None:
+        return AnalysisJSONResponse({
+            "status": "success",
+            "samples": profiler.samples,
+            "interval_seconds": profiler.interval,
+            "functions": [{"function": frame, "samples": count} for frame, count in profiler.top(top)]
+        })
+    return Response(profiler.collapsed(), media_type="text/plain; charset=utf-8")
+
+
 @app.get("/api/students/{student_id}/recommendations", tags=["Analysis"])
-async def get_student_recommendations(student_id: str):
+async def get_student_recommendations(student_id: str, request: Request):
     """
     Get personalized recommendations for a student based on their attendance pattern.
     
@@ -237,18 +1025,22 @@ async def get_student_recommendations(student_id: str):
         dict: Recommendations and action items
     """
     try:
-        analysis = analyzer.get_student_analysis(student_id)
+        etag = await response_etag()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        analysis = await run_analysis(analyzer.get_student_analysis, student_id)
         
         if 'error' in analysis:
             raise HTTPException(status_code=404, detail=analysis['error'])
         
-        return {
+        return AnalysisJSONResponse({
             "status": "success",
             "student_id": student_id,
             "student_name": analysis['student_name'],
             "risk_classification": analysis['risk_classification'],
             "recommendations": analysis['recommendations']
-        }
+        }, headers=cache_headers(etag))
     except HTTPException:
         raise
     except Exception as e:
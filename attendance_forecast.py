@@ -0,0 +1,183 @@
+"""
+Hours Completion Forecast - Attendance Analysis System
+
+Projects when each student will finish their required hours, and how
+likely they are to finish by students.end_date, from their recent daily
+hours rendered. Every student is forecast in one batched NumPy pass.
+
+Daily hours over the student's last FORECAST_RECENT_DAYS working days
+(holidays excluded) give a mean rate and its spread. The projected
+completion date is the working day on which the remaining hours run out
+at that rate. The on-time probability treats the remaining working days
+until end_date as independent draws of the recent daily hours, so their
+total is approximately normal (mean days * rate, variance days * spread^2).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from attendance_sources import LazyModule
+from attendance_store import AttendanceStore, encode_day
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = LazyModule('numpy')
+    pd = LazyModule('pandas')
+
+# Working days (records other than holidays) the recent hours rate uses
+FORECAST_RECENT_DAYS = 20
+
+# Fewest recent working days needed to forecast a student
+FORECAST_MIN_DAYS = 5
+
+# Forecast statuses, in report order
+FORECAST_STATUSES = ['completed', 'on_track', 'behind', 'stalled', 'no_end_date', 'insufficient_data']
+
+
+def normal_cdf(z: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (Abramowitz & Stegun 7.1.26, error below 1.5e-7)"""
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+
+def forecast_table(students_df: pd.DataFrame, records: AttendanceStore, as_of) -> pd.DataFrame:
+    """
+    Forecast hours completion for a set of students at once.
+    
+    Only records dated on or before as_of are used, so past dates give
+    the forecast that would have been made then.
+    
+    Args:
+        students_df: Students with id, name, required_hours and end_date
+        records: Their attendance records, grouped by student as in a
+            snapshot
+        as_of: Date the forecast is made on; working days are counted
+            from the later of as_of and the day after the last record
+    
+    Returns:
+        DataFrame indexed by student id in students_df order
+    """
+    as_of_day = encode_day(as_of)
+    records = records.between(None, as_of)
+    worked = records.select(~records.status_is('holiday'))
+    
+    count = len(worked)
+    student = worked.student
+    new_block = np.ones(count, dtype=bool)
+    new_block[1:] = student[1:] != student[:-1]
+    starts = np.flatnonzero(new_block)
+    sizes = np.diff(np.append(starts, count))
+    
+    # Recent records are the last FORECAST_RECENT_DAYS of each block
+    from_end = np.repeat(starts + sizes, sizes) - np.arange(count) - 1
+    recent = from_end < FORECAST_RECENT_DAYS
+    hours = np.rint(worked.hours.astype(float) * 100) / 100
+    indicators = {
+        'recent_days': recent.astype(np.int64),
+        'recent_hours': np.where(recent, hours, 0.0),
+        'recent_squares': np.where(recent, hours * hours, 0.0),
+    }
+    per_student = {
+        name: np.add.reduceat(values, starts) if count else np.zeros(0, dtype=values.dtype)
+        for name, values in indicators.items()
+    }
+    aggregates = pd.DataFrame(per_student, index=pd.Index(worked.student_ids[student[starts]], dtype=object))
+    
+    # Hours rendered (in hundredths, like the analysis) and the last
+    # recorded day run over every record, holidays included
+    blocks = np.flatnonzero(np.diff(records.student, prepend=-1) != 0)
+    totals = pd.DataFrame({
+        'hours_cents': np.add.reduceat(np.rint(records.hours.astype(float) * 100).astype(np.int64), blocks)
+        if len(records) else np.zeros(0, dtype=np.int64),
+        'last_day': records.day[np.append(blocks[1:], len(records)) - 1] if len(records) else np.zeros(0, dtype=np.int32),
+    }, index=pd.Index(records.student_ids[records.student[blocks]], dtype=object))
+    
+    students = students_df.drop_duplicates('id')
+    aggregates = aggregates.reindex(students['id'])
+    totals = totals.reindex(students['id'])
+    recent_days = aggregates['recent_days'].fillna(0).to_numpy(dtype=np.int64)
+    required_hours = students['required_hours'].to_numpy(dtype=float)
+    hours_rendered = totals['hours_cents'].fillna(0).to_numpy() / 100
+    remaining_hours = np.maximum(required_hours - hours_rendered, 0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_mean = aggregates['recent_hours'].to_numpy(dtype=float) / recent_days
+        variance = (aggregates['recent_squares'].to_numpy(dtype=float) - recent_days * daily_mean ** 2) / (recent_days - 1)
+        daily_std = np.sqrt(np.maximum(variance, 0))
+        
+        # Count working days from the day after the last record (or as_of)
+        last_day = totals['last_day'].fillna(as_of_day - 1).to_numpy(dtype=np.int64)
+        start_day = np.maximum(last_day + 1, as_of_day).astype('datetime64[D]')
+        end_date = pd.to_datetime(students['end_date']).to_numpy(dtype='datetime64[D]')
+        has_end = ~np.isnat(end_date)
+        days_left = np.where(
+            has_end, np.busday_count(start_day, np.where(has_end, end_date, start_day) + 1), 0
+        ).clip(min=0)
+        
+        forecastable = (remaining_hours > 0) & (recent_days >= FORECAST_MIN_DAYS) & (daily_mean > 0)
+        days_needed = np.where(forecastable, np.ceil(remaining_hours / np.where(forecastable, daily_mean, 1)), 0)
+        projected = np.where(
+            forecastable,
+            np.busday_offset(start_day, np.maximum(days_needed - 1, 0).astype(np.int64), roll='forward'),
+            np.datetime64('NaT', 'D')
+        )
+        
+        # P(hours over the remaining working days >= remaining hours)
+        expected = days_left * daily_mean
+        spread = daily_std * np.sqrt(days_left)
+        probability = np.where(
+            spread > 0,
+            1 - normal_cdf((remaining_hours - expected) / np.where(spread > 0, spread, 1)),
+            (expected >= remaining_hours).astype(float)
+        )
+    
+    status = np.select(
+        [
+            remaining_hours <= 0,
+            recent_days < FORECAST_MIN_DAYS,
+            daily_mean <= 0,
+            ~has_end,
+            projected <= end_date,
+        ],
+        ['completed', 'insufficient_data', 'stalled', 'no_end_date', 'on_track'],
+        default='behind'
+    )
+    probability = np.select(
+        [status == 'completed', (status == 'insufficient_data') | ~has_end],
+        [1.0, np.nan],
+        default=probability
+    )
+    
+    return pd.DataFrame({
+        'student_name': students['name'].to_numpy(),
+        'required_hours': required_hours,
+        'hours_rendered': hours_rendered,
+        'remaining_hours': remaining_hours,
+        'recent_days': recent_days,
+        'daily_hours': np.where(recent_days > 0, daily_mean, np.nan),
+        'daily_hours_std': np.where(recent_days > 1, daily_std, np.nan),
+        'end_date': end_date,
+        'working_days_left': days_left,
+        'working_days_needed': days_needed.astype(np.int64),
+        'projected_completion_date': projected,
+        'on_time_probability': probability,
+        'status': status,
+    }, index=aggregates.index)
+
+
+def forecast_summary(table: pd.DataFrame) -> Dict:
+    """Summarize a forecast table: status counts and mean on-time probability"""
+    counts = table['status'].value_counts()
+    probability = table['on_time_probability'].dropna()
+    return {
+        'total_students': len(table),
+        'status_distribution': {status: int(counts.get(status, 0)) for status in FORECAST_STATUSES},
+        'average_on_time_probability': round(float(probability.mean()), 3) if len(probability) else None,
+        'students_below_half_probability': int((probability < 0.5).sum())
+    }
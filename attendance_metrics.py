@@ -0,0 +1,318 @@
+"""
+Metrics - Attendance Analysis System
+
+Minimal in-process metrics in the Prometheus text exposition format,
+plus a sampling profiler for individual requests.
+
+The analyzer records per-stage timings and rows/bytes loaded here; the
+API adds per-endpoint latencies and serves everything at /metrics.
+"""
+
+from collections import Counter as StackCounter
+import bisect
+import functools
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond lookups to full reloads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = '') -> str:
+    """Render a label set as {name="value",...}"""
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, keeping integers free of a trailing .0"""
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """Base class of a named metric family with optional labels"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict) -> Tuple:
+        """Order label values by the declared label names"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(labels[name] for name in self.labelnames)
+    
+    def samples(self) -> List[str]:
+        """Exposition lines of every labelled series"""
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        """Exposition text of the whole family"""
+        return '\n'.join([
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+            *self.samples()
+        ])
+
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add amount to the series selected by labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+    
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation in the series selected by labels"""
+        self._observe_key(value, self._key(labels))
+    
+    def time(self, **labels) -> 'Timer':
+        """Observe the wall-clock duration of a with block or decorated function"""
+        return Timer(self, self._key(labels))
+    
+    def _observe_key(self, value: float, key: Tuple) -> None:
+        """Record one observation in the series of an already-ordered label key"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                le = 'le="{}"'.format(_format_value(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Timer:
+    """
+    Context manager and decorator timing into one histogram series.
+    
+    Labels are resolved once, when the timer is created, so timing a hot
+    function costs two perf_counter calls and one locked update.
+    """
+    
+    def __init__(self, histogram: Histogram, key: Tuple):
+        self._histogram = histogram
+        self._key = key
+        self._started = threading.local()
+    
+    def __enter__(self) -> 'Timer':
+        self._started.__dict__.setdefault('stack', []).append(time.perf_counter())
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._histogram._observe_key(time.perf_counter() - self._started.stack.pop(), self._key)
+    
+    def __call__(self, func: Callable) -> Callable:
+        histogram, key = self._histogram, self._key
+        
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram._observe_key(time.perf_counter() - started, key)
+        
+        return timed
+
+
+class MetricsRegistry:
+    """
+    Collection of metric families rendered together.
+    
+    Collectors are callables run at scrape time that return
+    (name, type, documentation, value) tuples, for values that are
+    already tracked elsewhere (e.g. the analyzer's cache counters).
+    """
+    
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter family"""
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram family"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, float]]]) -> None:
+        """Add a callable producing scrape-time samples"""
+        with self._lock:
+            self._collectors.append(collector)
+    
+    def render(self) -> str:
+        """Exposition text of every metric, in the Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        
+        blocks = [metric.render() for metric in metrics]
+        for collector in collectors:
+            for name, kind, documentation, value in collector():
+                blocks.append(f'# HELP {name} {documentation}\n# TYPE {name} {kind}\n{name} {_format_value(value)}')
+        return '\n'.join(blocks) + '\n'
+
+
+# Process-wide registry and the analyzer's metric families
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'attendance_analysis_stage_seconds', 'Time spent in each analyzer stage', ['stage']
+)
+ROWS_LOADED = registry.counter(
+    'attendance_analysis_rows_loaded_total', 'Rows read from the data source', ['table']
+)
+BYTES_LOADED = registry.counter(
+    'attendance_analysis_bytes_loaded_total', 'Shallow in-memory size of the frames read from the data source', ['table']
+)
+
+
+def stage_timer(stage: str) -> Timer:
+    """Time a with block or decorated function as an analyzer stage"""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def record_load(table: str, frame) -> None:
+    """
+    Count the rows and bytes of a frame read from the data source.
+    
+    Bytes are the shallow size (object columns count one pointer per
+    value): the deep size walks every Python string, an O(rows) pass on
+    the load path.
+    """
+    ROWS_LOADED.inc(len(frame), table=table)
+    BYTES_LOADED.inc(int(frame.memory_usage(index=False).sum()), table=table)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling thread stacks at a fixed interval.
+    
+    A background thread records the call stack of every matching thread
+    (by default the analysis pool's threads) until stopped. Samples are
+    aggregated as collapsed stacks ("outer;inner;leaf count"), the input
+    format of flame graph tools. Work of concurrent requests running on
+    the same threads is included.
+    """
+    
+    def __init__(self, interval: float = 0.005, thread_prefix: Optional[str] = 'analysis'):
+        """
+        Create a profiler.
+        
+        Args:
+            interval: Seconds between samples
+            thread_prefix: Sample only threads whose name starts with this
+                (None for every thread but the profiler's own)
+        """
+        self.interval = interval
+        self.thread_prefix = thread_prefix
+        self.samples = 0
+        self.stacks = StackCounter()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _sample(self) -> None:
+        """Record one stack per matching thread"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident():
+                continue
+            if self.thread_prefix is not None and not names.get(ident, '').startswith(self.thread_prefix):
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def start(self) -> 'SamplingProfiler':
+        """Start sampling in a background thread"""
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> 'SamplingProfiler':
+        """Stop sampling and wait for the sampler thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+    
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks, most frequent first"""
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+    
+    def top(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """Functions seen in the most samples (inclusive), with their sample counts"""
+        inclusive = StackCounter()
+        for stack, count in self.stacks.items():
+            for frame in set(stack.split(';')):
+                inclusive[frame] += count
+        return inclusive.most_common(limit)
@@ -0,0 +1,243 @@
+"""
+Parallel Cohort Analysis - Attendance Analysis System
+
+Opt-in multi-process execution of the cohort analysis for very large
+institutions. Students are partitioned into contiguous shards balanced by
+record count; each worker process receives only its shard's slice of the
+snapshot's attendance arrays, read straight from shared memory, and the
+per-shard analysis tables or risk summaries are merged at the end.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+import threading
+import weakref
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from attendance_sources import LazyModule
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = LazyModule('numpy')
+    pd = LazyModule('pandas')
+
+# Store columns shared with workers (attendance ids are not needed)
+SHARED_COLUMNS = ('student', 'day', 'status', 'hours')
+
+
+class SharedArrays:
+    """
+    Copies of NumPy arrays in named shared memory blocks.
+    
+    The spec (block names, dtypes and shapes) is small and picklable;
+    workers map the blocks with attach() instead of receiving the data.
+    The owner must call close() (done automatically for snapshots).
+    """
+    
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._blocks = []
+        self.spec = {}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.spec[name] = (block.name, array.dtype.str, array.shape)
+    
+    def close(self) -> None:
+        """Release and remove the shared memory blocks"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+    
+    @staticmethod
+    def attach(spec: Dict) -> Dict[str, shared_memory.SharedMemory]:
+        """Map the blocks of a spec (close them once no view is left)"""
+        return {name: shared_memory.SharedMemory(name=block_name) for name, (block_name, _, _) in spec.items()}
+    
+    @staticmethod
+    def views(spec: Dict, blocks: Dict[str, shared_memory.SharedMemory]) -> Dict[str, np.ndarray]:
+        """Zero-copy arrays over mapped blocks"""
+        return {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[name].buf)
+            for name, (_, dtype, shape) in spec.items()
+        }
+
+
+def shard_bounds(offsets: np.ndarray, shards: int) -> List[int]:
+    """
+    Split student codes into contiguous shards with similar record counts.
+    
+    Args:
+        offsets: Record offsets per student code (AttendanceStore.offsets)
+        shards: Number of shards wanted
+    
+    Returns:
+        Increasing student code boundaries, from 0 to the number of codes
+    """
+    total_codes = len(offsets) - 1
+    targets = np.arange(1, shards) * (offsets[-1] / shards)
+    cuts = np.searchsorted(offsets, targets).tolist()
+    return sorted(set([0, *[min(cut, total_codes) for cut in cuts], total_codes]))
+
+
+def merge_risk_summaries(partials: List[Dict]) -> Dict:
+    """
+    Merge per-shard risk summaries.
+    
+    Shards cover contiguous, increasing ranges of student ids, so the
+    critical student lists concatenate in the same order as a serial run.
+    """
+    return {
+        'total_students': sum(partial['total_students'] for partial in partials),
+        'risk_distribution': {
+            risk: sum(partial['risk_distribution'][risk] for partial in partials)
+            for risk in partials[0]['risk_distribution']
+        },
+        'critical_students': [student for partial in partials for student in partial['critical_students']]
+    }
+
+
+_worker_analyzer = None
+
+
+def _init_worker() -> None:
+    """Import the analysis stack once per worker process"""
+    global _worker_analyzer
+    from attendance_analysis import AttendanceAnalyzer
+    _worker_analyzer = AttendanceAnalyzer()
+    np.zeros(0)
+    pd.DataFrame()
+
+
+def _analyze_shard(spec: Dict, records: Tuple[int, int], first_code: int,
+                   student_ids: np.ndarray, students_df: pd.DataFrame, task: str, policy):
+    """
+    Worker entry point: analyze one shard read from shared memory.
+    
+    Args:
+        spec: SharedArrays spec of the snapshot's store columns
+        records: (start, stop) record range of the shard
+        first_code: Student code of the shard's first student
+        student_ids: Interned UUIDs of the shard's student codes
+        students_df: The shard's rows of the students frame
+        task: 'table' for the analysis table, 'risk' for a risk summary
+        policy: RiskPolicy of the parent's analyzer
+    """
+    _worker_analyzer.policy = policy
+    blocks = SharedArrays.attach(spec)
+    try:
+        return _analyze_records(spec, blocks, records, first_code, student_ids, students_df, task)
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+def _analyze_records(spec, blocks, records, first_code, student_ids, students_df, task):
+    """Run the vectorized pipeline on views of the shard (no view outlives this call)"""
+    from attendance_store import AttendanceStore
+    
+    start, stop = records
+    columns = {name: array[start:stop] for name, array in SharedArrays.views(spec, blocks).items()}
+    store = AttendanceStore(
+        student_ids,
+        (columns['student'] - first_code).astype(np.int32),
+        columns['day'],
+        columns['status'],
+        columns['hours']
+    )
+    table = _worker_analyzer._analysis_table(students_df, _worker_analyzer._aggregate_attendance(store))
+    if task == 'risk':
+        return _worker_analyzer._risk_summary_from_table(table)
+    return table
+
+
+class ParallelCohortAnalyzer:
+    """
+    Process pool running the cohort analysis shard by shard.
+    
+    The pool uses the spawn start method, so it is safe to create from a
+    multi-threaded server. A snapshot's arrays are copied into shared
+    memory once, on its first parallel computation, and released when the
+    snapshot is garbage collected.
+    """
+    
+    def __init__(self, workers: int, shards: Optional[int] = None):
+        """
+        Create the analyzer; worker processes start on first use.
+        
+        Args:
+            workers: Number of worker processes
+            shards: Number of shards per computation (default: workers)
+        """
+        self.workers = workers
+        self.shards = shards or workers
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Worker pool, started on first use"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=get_context('spawn'), initializer=_init_worker
+                )
+            return self._pool
+    
+    def close(self) -> None:
+        """Shut the worker processes down"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+    
+    def _shared(self, snapshot) -> SharedArrays:
+        """Get the snapshot's store columns in shared memory, copying them on first use"""
+        with self._lock:
+            if snapshot.shared_arrays is None:
+                store = snapshot.attendances
+                shared = SharedArrays({name: getattr(store, name) for name in SHARED_COLUMNS})
+                weakref.finalize(snapshot, shared.close)
+                snapshot.shared_arrays = shared
+            return snapshot.shared_arrays
+    
+    def _map(self, snapshot, task: str, policy) -> List:
+        """Run a task on every shard of a snapshot under a risk policy, in shard order"""
+        store = snapshot.attendances
+        spec = self._shared(snapshot).spec
+        offsets = store.offsets
+        bounds = shard_bounds(offsets, self.shards)
+        
+        student_ids = snapshot.students_df['id'].to_numpy(dtype=object)
+        rows = [0]
+        for code in bounds[1:-1]:
+            rows.append(int(np.searchsorted(student_ids, store.student_ids[code])))
+        rows.append(len(student_ids))
+        
+        futures = [
+            self.pool.submit(
+                _analyze_shard,
+                spec,
+                (int(offsets[first]), int(offsets[last])),
+                first,
+                store.student_ids[first:last],
+                snapshot.students_df.iloc[rows[shard]:rows[shard + 1]],
+                task,
+                policy
+            )
+            for shard, (first, last) in enumerate(zip(bounds[:-1], bounds[1:]))
+        ]
+        return [future.result() for future in futures]
+    
+    def analysis_table(self, snapshot, policy) -> pd.DataFrame:
+        """Compute the cohort's analysis table across the pool"""
+        return pd.concat(self._map(snapshot, 'table', policy))
+    
+    def risk_summary(self, snapshot, policy) -> Dict:
+        """Compute the cohort's risk summary across the pool"""
+        return merge_risk_summaries(self._map(snapshot, 'risk', policy))
@@ -0,0 +1,290 @@
+"""
+Risk Policies - Attendance Analysis System
+
+The risk score weights, risk level thresholds, attendance pattern bands
+and recommendation rules of the analysis, as data. Policies are read
+from a JSON file and each one is compiled once into NumPy expressions
+(np.select over cohort arrays), so reclassifying a whole cohort under
+another policy is a handful of array operations on the cached analysis
+table.
+
+A policy file maps policy names to specs. A spec may give only the keys
+it changes; the rest come from DEFAULT_POLICY, the built-in rules:
+
+    {
+        "strict": {
+            "risk_levels": [
+                {"level": "excellent", "min_score": 85},
+                {"level": "good", "min_score": 70},
+                {"level": "warning", "min_score": 50}
+            ]
+        }
+    }
+
+Recommendation rules apply to students at the rule's risk level whose
+condition holds. A condition compares a metric (see RULE_METRICS) with a
+value, optionally scaled by another metric:
+{"metric": "absent_count", "op": ">", "value": 0.3, "of": "total_days"}
+reads absent_count > total_days * 0.3. Texts may reference metrics as
+format fields, e.g. "{remaining_hours}".
+"""
+
+from __future__ import annotations
+
+import json
+import operator
+from string import Formatter
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from attendance_sources import LazyModule
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = LazyModule('numpy')
+
+# Name of the built-in policy
+DEFAULT_POLICY_NAME = 'default'
+
+# The built-in policy: the analysis rules as originally written
+DEFAULT_POLICY = {
+    # Weights of the attendance rate, absence and hours completion scores
+    # (each 0-100) in the risk score
+    'weights': {'attendance': 0.4, 'absence': 0.3, 'hours': 0.3},
+    # Risk levels from best to worst by minimum risk score; students
+    # below every threshold get default_risk
+    'risk_levels': [
+        {'level': 'excellent', 'min_score': 80},
+        {'level': 'good', 'min_score': 60},
+        {'level': 'warning', 'min_score': 40},
+    ],
+    'default_risk': 'critical',
+    # Attendance patterns by minimum present + late rate, same layout
+    'pattern_bands': [
+        {'pattern': 'consistent', 'min_rate': 90},
+        {'pattern': 'irregular', 'min_rate': 70},
+        {'pattern': 'concerning', 'min_rate': 50},
+    ],
+    'default_pattern': 'critical',
+    'recommendations': [
+        {
+            'risk': 'critical',
+            'text': 'Critical: Immediate intervention required. Student attendance is severely below acceptable levels.'
+        },
+        {
+            'risk': 'critical',
+            'when': {'metric': 'absent_count', 'op': '>', 'value': 0.3, 'of': 'total_days'},
+            'text': 'Student has excessive absences. Consider meeting to discuss barriers to attendance.'
+        },
+        {
+            'risk': 'critical',
+            'when': {'metric': 'remaining_hours', 'op': '>', 'value': 0},
+            'text': 'Student needs to render {remaining_hours} more hours to meet requirements.'
+        },
+        {
+            'risk': 'warning',
+            'text': 'Warning: Student attendance is below acceptable levels. Monitor closely.'
+        },
+        {
+            'risk': 'warning',
+            'when': {'metric': 'late_count', 'op': '>', 'value': 0.2, 'of': 'total_days'},
+            'text': 'Student has frequent late arrivals. Discuss punctuality expectations.'
+        },
+        {
+            'risk': 'warning',
+            'when': {'metric': 'remaining_hours', 'op': '>', 'value': 0},
+            'text': 'Student should prioritize rendering remaining {remaining_hours} hours.'
+        },
+        {
+            'risk': 'good',
+            'text': 'Good: Student attendance is acceptable. Maintain current level.'
+        },
+        {
+            'risk': 'good',
+            'when': {'metric': 'pattern', 'op': '==', 'value': 'irregular'},
+            'text': 'Student shows some inconsistency. Encourage maintaining consistent attendance.'
+        },
+        {
+            'risk': 'excellent',
+            'text': 'Excellent: Student demonstrates outstanding attendance and commitment.'
+        },
+        {
+            'risk': 'excellent',
+            'text': 'Student is on track to complete all requirements.'
+        },
+    ],
+}
+
+# Per-student metrics recommendation rules can test and format
+RULE_METRICS = [
+    'total_days', 'present_count', 'late_count', 'absent_count', 'half_day_count', 'holiday_count',
+    'attendance_rate', 'pattern', 'hours_rendered', 'remaining_hours'
+]
+
+# Risk level of students without records
+INSUFFICIENT_DATA = 'insufficient_data'
+
+RULE_OPERATORS = {
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt,
+    '<=': operator.le, '==': operator.eq, '!=': operator.ne,
+}
+
+
+def _bands(policy: str, spec: Dict, key: str, name: str, bound: str) -> List:
+    """Validate a best-to-worst list of {name, bound} thresholds"""
+    bands = spec[key]
+    if not bands or any(set(band) != {name, bound} for band in bands):
+        raise ValueError(f"Policy '{policy}' {key} must be a non-empty list of {{'{name}', '{bound}'}} objects")
+    bounds = [float(band[bound]) for band in bands]
+    if bounds != sorted(bounds, reverse=True):
+        raise ValueError(f"Policy '{policy}' {key} must be ordered from the highest {bound} to the lowest")
+    return [(band[name], value) for band, value in zip(bands, bounds)]
+
+
+class RiskPolicy:
+    """
+    A validated risk policy compiled into vectorized rules.
+    
+    Policies pickle as their name and spec, so they can be sent to the
+    parallel analysis workers.
+    """
+    
+    def __init__(self, name: str, spec: Optional[Dict] = None):
+        """
+        Validate and compile a policy.
+        
+        Args:
+            name: Policy name
+            spec: Policy spec; missing keys come from DEFAULT_POLICY
+        
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        spec = {**DEFAULT_POLICY, **(spec or {})}
+        unknown = set(spec) - set(DEFAULT_POLICY)
+        if unknown:
+            raise ValueError(f"Policy '{name}' has unknown keys: {', '.join(sorted(unknown))}")
+        if set(spec['weights']) != set(DEFAULT_POLICY['weights']):
+            raise ValueError(f"Policy '{name}' weights must be exactly: {', '.join(DEFAULT_POLICY['weights'])}")
+        
+        self.name = name
+        self.spec = spec
+        self.weights = {factor: float(weight) for factor, weight in spec['weights'].items()}
+        self.risk_bands = _bands(name, spec, 'risk_levels', 'level', 'min_score')
+        self.default_risk = spec['default_risk']
+        self.pattern_bands = _bands(name, spec, 'pattern_bands', 'pattern', 'min_rate')
+        self.default_pattern = spec['default_pattern']
+        self.risk_levels = [level for level, _ in self.risk_bands] + [self.default_risk]
+        self._rules = [self._compile_rule(rule) for rule in spec['recommendations']]
+    
+    def __reduce__(self):
+        return RiskPolicy, (self.name, self.spec)
+    
+    def _compile_rule(self, rule: Dict):
+        """Turn a recommendation rule into (risk, condition, text, fields)"""
+        if rule.get('risk') not in self.risk_levels or not isinstance(rule.get('text'), str):
+            raise ValueError(
+                f"Policy '{self.name}' recommendation needs a 'text' and a 'risk' among: {', '.join(self.risk_levels)}"
+            )
+        fields = [field for _, field, _, _ in Formatter().parse(rule['text']) if field]
+        when = rule.get('when')
+        names = fields + ([when.get('metric'), when.get('of')] if when else [])
+        if any(metric is not None and metric not in RULE_METRICS for metric in names):
+            raise ValueError(f"Policy '{self.name}' recommendation uses unknown metrics; expected: {', '.join(RULE_METRICS)}")
+        if when is None:
+            return rule['risk'], None, rule['text'], fields
+        
+        compare = RULE_OPERATORS.get(when.get('op'))
+        if compare is None or 'metric' not in when or 'value' not in when:
+            raise ValueError(
+                f"Policy '{self.name}' condition needs 'metric', 'value' and an 'op' among: {' '.join(RULE_OPERATORS)}"
+            )
+        metric, value, scale = when['metric'], when['value'], when.get('of')
+        if scale is None:
+            return rule['risk'], lambda metrics: compare(metrics[metric], value), rule['text'], fields
+        return rule['risk'], lambda metrics: compare(metrics[metric], metrics[scale] * value), rule['text'], fields
+    
+    def risk_score(self, attendance_rate: np.ndarray, absent_count: np.ndarray, total_days: np.ndarray,
+                   remaining_hours: np.ndarray, required_hours: np.ndarray) -> np.ndarray:
+        """
+        Weighted risk score (0-100) of every student.
+        
+        Factors considered:
+        - Attendance rate
+        - Absence count, against a third of the recorded days
+        - Hours completion
+        """
+        attendance_score = attendance_rate * self.weights['attendance']
+        
+        absence_score = (1 - np.minimum(absent_count / np.maximum(total_days / 3, 1), 1)) * 100 * self.weights['absence']
+        
+        hours_score = (1 - (remaining_hours / np.maximum(required_hours, 1))) * 100 * self.weights['hours']
+        
+        return attendance_score + absence_score + hours_score
+    
+    def classify(self, attendance_rate: np.ndarray, absent_count: np.ndarray, total_days: np.ndarray,
+                 remaining_hours: np.ndarray, required_hours: np.ndarray) -> np.ndarray:
+        """Risk level of every student (INSUFFICIENT_DATA without records)"""
+        score = self.risk_score(attendance_rate, absent_count, total_days, remaining_hours, required_hours)
+        return np.select(
+            [total_days == 0, *(score >= threshold for _, threshold in self.risk_bands)],
+            [INSUFFICIENT_DATA, *(level for level, _ in self.risk_bands)],
+            default=self.default_risk
+        )
+    
+    def pattern(self, present: np.ndarray, late: np.ndarray, total: np.ndarray) -> np.ndarray:
+        """Attendance pattern of every student from the present + late rate ('no_data' without records)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = (present + late) / total * 100
+        return np.select(
+            [total == 0, *(rate >= threshold for _, threshold in self.pattern_bands)],
+            ['no_data', *(pattern for pattern, _ in self.pattern_bands)],
+            default=self.default_pattern
+        )
+    
+    def recommendations(self, risk: np.ndarray, metrics: Dict[str, np.ndarray]) -> List[List[str]]:
+        """
+        Recommendations of every student, in rule order.
+        
+        Args:
+            risk: Risk level of every student
+            metrics: Array of every RULE_METRICS metric a rule uses
+        
+        Returns:
+            One list of recommendation texts per student
+        """
+        count = len(risk)
+        hits = np.zeros((count, len(self._rules)), dtype=bool)
+        for column, (level, condition, _, _) in enumerate(self._rules):
+            hits[:, column] = (risk == level) & (condition(metrics) if condition is not None else True)
+        
+        values = {}
+        results = [[] for _ in range(count)]
+        for student, column in zip(*(axis.tolist() for axis in np.nonzero(hits))):
+            _, _, text, fields = self._rules[column]
+            for field in fields:
+                if field not in values:
+                    values[field] = np.asarray(metrics[field]).tolist()
+            results[student].append(text.format(**{field: values[field][student] for field in fields}) if fields else text)
+        return results
+
+
+def load_policies(path: Optional[str] = None) -> Dict[str, RiskPolicy]:
+    """
+    Load the risk policies of a JSON policy file.
+    
+    Args:
+        path: File mapping policy names to specs (None: built-in only)
+    
+    Returns:
+        Policies by name; DEFAULT_POLICY_NAME is always present and may
+        be overridden by the file
+    """
+    specs = {DEFAULT_POLICY_NAME: {}}
+    if path:
+        with open(path) as f:
+            loaded = json.load(f)
+        if not isinstance(loaded, dict) or not all(isinstance(spec, dict) for spec in loaded.values()):
+            raise ValueError(f"Policy file '{path}' must map policy names to policy objects")
+        specs.update(loaded)
+    return {name: RiskPolicy(name, spec) for name, spec in specs.items()}
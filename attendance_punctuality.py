@@ -0,0 +1,256 @@
+"""
+Punctuality Analysis - Attendance Analysis System
+
+Shift-aware arrival and departure metrics computed from the time_in and
+time_out columns against each student's shift_start and shift_end.
+
+Times are held as integer minutes after midnight (see AttendanceStore),
+so every metric is plain NumPy arithmetic over the whole cohort. Offsets
+are taken on the 24-hour clock and wrapped to [-12h, +12h), which handles
+shifts crossing midnight (e.g. a 22:00 start and a 00:15 time_in is 135
+minutes late) the way AttendanceController's Carbon day rollover does.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from attendance_sources import LazyModule
+from attendance_store import MINUTES_PER_DAY, MISSING_TIME, AttendanceStore, encode_times
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = LazyModule('numpy')
+    pd = LazyModule('pandas')
+
+# Upper bounds (inclusive, in minutes) of the minutes-late distribution
+# buckets; arrivals at or before shift_start are on time, as in
+# AttendanceController's late check
+LATENESS_BUCKETS = [(0, 'on_time'), (5, '1_5'), (15, '6_15'), (30, '16_30'), (60, '31_60')]
+LATENESS_OVERFLOW = 'over_60'
+
+# Shift label of students without a shift_name
+UNASSIGNED_SHIFT = 'Unassigned'
+
+
+def clock_offset(actual: np.ndarray, scheduled: np.ndarray) -> np.ndarray:
+    """Signed minutes from scheduled to actual time of day, wrapped to [-720, 720)"""
+    half_day = MINUTES_PER_DAY // 2
+    return (actual.astype(np.int32) - scheduled.astype(np.int32) + half_day) % MINUTES_PER_DAY - half_day
+
+
+def student_shifts(students_df: pd.DataFrame, student_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get shift times and names aligned with a store's student codes.
+    
+    Args:
+        students_df: Students with id, shift_start, shift_end and shift_name
+        student_ids: The store's interned student UUIDs
+    
+    Returns:
+        Tuple of (shift_start minutes, shift_end minutes, shift names) per
+        student code; codes without a student row get MISSING_TIME and
+        UNASSIGNED_SHIFT
+    """
+    students = students_df.drop_duplicates('id').set_index('id').reindex(student_ids)
+    return encode_times(students['shift_start']), encode_times(students['shift_end']), shift_names(students)
+
+
+def shift_names(students_df: pd.DataFrame) -> np.ndarray:
+    """Shift name of every student row (UNASSIGNED_SHIFT if null)"""
+    names = students_df['shift_name'].astype(object)
+    return names.where(names.notna(), UNASSIGNED_SHIFT).to_numpy(dtype=object)
+
+
+def record_punctuality(records: AttendanceStore, shift_start: np.ndarray, shift_end: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute arrival and departure metrics of every record.
+    
+    Arrivals are attended records (present, late, half_day) with a time_in
+    and a scheduled shift_start. Departures are full days (present, late)
+    with a time_out and a shift_end; half days leave early by design.
+    
+    Args:
+        records: Store with time_in and time_out columns
+        shift_start: Shift start minutes per student code
+        shift_end: Shift end minutes per student code
+    
+    Returns:
+        Per-record arrays: arrival and departure masks, minutes_late,
+        early_minutes and overtime_minutes (0 where not applicable)
+    """
+    start = shift_start[records.student]
+    end = shift_end[records.student]
+    arrival = records.status_is('present', 'late', 'half_day') & (records.time_in != MISSING_TIME) & (start != MISSING_TIME)
+    departure = records.status_is('present', 'late') & (records.time_out != MISSING_TIME) & (end != MISSING_TIME)
+    
+    arrival_offset = np.where(arrival, clock_offset(records.time_in, start), 0)
+    departure_offset = np.where(departure, clock_offset(records.time_out, end), 0)
+    return {
+        'arrival': arrival,
+        'departure': departure,
+        'minutes_late': np.maximum(arrival_offset, 0),
+        'early_minutes': np.maximum(-departure_offset, 0),
+        'overtime_minutes': np.maximum(departure_offset, 0),
+    }
+
+
+def lateness_distribution(minutes_late: np.ndarray) -> Dict[str, int]:
+    """Count arrivals per minutes-late bucket (zero counts included)"""
+    edges = [bound for bound, _ in LATENESS_BUCKETS]
+    labels = [label for _, label in LATENESS_BUCKETS] + [LATENESS_OVERFLOW]
+    counts = np.bincount(np.searchsorted(edges, minutes_late, side='left'), minlength=len(labels))
+    return {label: int(count) for label, count in zip(labels, counts)}
+
+
+def punctuality_table(students_df: pd.DataFrame, records: AttendanceStore) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+    """
+    Compute punctuality metrics for a set of students at once.
+    
+    records must be grouped by student, as in a snapshot. Per-record
+    metrics are summed per student with one np.add.reduceat over the
+    student blocks, like the analyzer's attendance aggregates.
+    
+    Args:
+        students_df: Students to report, with their shift columns
+        records: Their attendance records, with time columns
+    
+    Returns:
+        Tuple of (metrics indexed by student id in students_df order,
+        per-record metrics from record_punctuality plus 'shift', each
+        record's code into the sorted shift names of 'shift_names')
+    """
+    shift_start, shift_end, names = student_shifts(students_df, records.student_ids)
+    per_record = record_punctuality(records, shift_start, shift_end)
+    
+    # Shift names are compared as small integer codes, not per-record strings
+    labels, shift_codes = np.unique(np.append(names, shift_names(students_df)).astype(str), return_inverse=True)
+    per_record['shift'] = shift_codes[:len(names)][records.student]
+    per_record['shift_names'] = labels.astype(object)
+    
+    count = len(records)
+    student = records.student
+    new_block = np.ones(count, dtype=bool)
+    new_block[1:] = student[1:] != student[:-1]
+    starts = np.flatnonzero(new_block)
+    
+    late = per_record['minutes_late'] > 0
+    early = per_record['early_minutes'] > 0
+    columns = {
+        'arrivals': per_record['arrival'],
+        'late_arrivals': late,
+        'minutes_late': per_record['minutes_late'],
+        'departures': per_record['departure'],
+        'early_departures': early,
+        'early_minutes': per_record['early_minutes'],
+        'overtime_days': per_record['overtime_minutes'] > 0,
+        'overtime_minutes': per_record['overtime_minutes'],
+    }
+    sums = {
+        name: np.add.reduceat(values.astype(np.int64), starts) if count else np.zeros(0, dtype=np.int64)
+        for name, values in columns.items()
+    }
+    sums['max_minutes_late'] = (
+        np.maximum.reduceat(per_record['minutes_late'], starts) if count else np.zeros(0, dtype=np.int64)
+    )
+    aggregates = pd.DataFrame(sums, index=pd.Index(records.student_ids[student[starts]], dtype=object))
+    
+    students = students_df.drop_duplicates('id')
+    aggregates = aggregates.reindex(students['id'], fill_value=0)
+    arrivals = aggregates['arrivals'].to_numpy()
+    late_arrivals = aggregates['late_arrivals'].to_numpy()
+    departures = aggregates['departures'].to_numpy()
+    early_departures = aggregates['early_departures'].to_numpy()
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table = pd.DataFrame({
+            'student_name': students['name'].to_numpy(),
+            'shift_name': shift_names(students),
+            'arrivals': arrivals,
+            'on_time_arrivals': arrivals - late_arrivals,
+            'late_arrivals': late_arrivals,
+            'punctuality_rate': np.round(np.where(arrivals > 0, (arrivals - late_arrivals) / arrivals * 100, np.nan), 2),
+            'average_minutes_late': np.round(
+                np.where(late_arrivals > 0, aggregates['minutes_late'].to_numpy() / late_arrivals, np.nan), 2
+            ),
+            'max_minutes_late': aggregates['max_minutes_late'].to_numpy(),
+            'departures': departures,
+            'early_departures': early_departures,
+            'average_early_minutes': np.round(
+                np.where(early_departures > 0, aggregates['early_minutes'].to_numpy() / early_departures, np.nan), 2
+            ),
+            'overtime_days': aggregates['overtime_days'].to_numpy(),
+            'overtime_minutes': aggregates['overtime_minutes'].to_numpy(),
+        }, index=aggregates.index)
+    return table, per_record
+
+
+def _rate(count: int, total: int) -> Optional[float]:
+    """Percentage rounded like attendance rates (None without a total)"""
+    return round(count / total * 100, 2) if total > 0 else None
+
+
+def punctuality_metrics(per_record: Dict[str, np.ndarray], mask=None) -> Dict:
+    """
+    Summarize the per-record metrics of a cohort or shift.
+    
+    Args:
+        per_record: Arrays from punctuality_table
+        mask: Optional records to restrict to
+    
+    Returns:
+        Arrival counts and rates, minutes-late statistics and distribution,
+        early departure and overtime totals
+    """
+    if mask is None:
+        mask = np.ones(len(per_record['arrival']), dtype=bool)
+    arrival = per_record['arrival'] & mask
+    departure = per_record['departure'] & mask
+    minutes_late = per_record['minutes_late'][arrival]
+    late_minutes = minutes_late[minutes_late > 0]
+    early = per_record['early_minutes'][departure]
+    overtime = per_record['overtime_minutes'][departure]
+    
+    arrivals = int(arrival.sum())
+    departures = int(departure.sum())
+    return {
+        'arrivals': arrivals,
+        'late_arrivals': len(late_minutes),
+        'punctuality_rate': _rate(arrivals - len(late_minutes), arrivals),
+        'minutes_late': {
+            'average': round(float(late_minutes.mean()), 2) if len(late_minutes) else None,
+            'median': float(np.median(late_minutes)) if len(late_minutes) else None,
+            'p90': round(float(np.percentile(late_minutes, 90)), 2) if len(late_minutes) else None,
+            'max': int(late_minutes.max()) if len(late_minutes) else None,
+            'distribution': lateness_distribution(minutes_late)
+        },
+        'departures': departures,
+        'early_departures': int((early > 0).sum()),
+        'early_departure_rate': _rate(int((early > 0).sum()), departures),
+        'overtime_days': int((overtime > 0).sum()),
+        'overtime_hours': round(int(overtime.sum()) / 60, 2),
+    }
+
+
+def shift_comparison(per_record: Dict[str, np.ndarray], table: pd.DataFrame) -> List[Dict]:
+    """
+    Compare punctuality metrics across shifts.
+    
+    Args:
+        per_record: Arrays from punctuality_table
+        table: Per-student table from punctuality_table
+    
+    Returns:
+        One summary per shift name, in name order
+    """
+    student_counts = table['shift_name'].value_counts()
+    return [
+        {
+            'shift_name': name,
+            'students': int(student_counts.get(name, 0)),
+            **punctuality_metrics(per_record, per_record['shift'] == code)
+        }
+        for code, name in enumerate(per_record['shift_names'].tolist())
+    ]
@@ -0,0 +1,224 @@
+"""
+Precompute Scheduler - Attendance Analysis System
+
+Keeps an expensive result (e.g. the cohort risk summary) precomputed in
+the background of an asyncio application, so readers get the last
+completed result instantly instead of computing it per request.
+"""
+
+from datetime import datetime
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from attendance_metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_RUNS = registry.counter(
+    'attendance_precompute_runs_total', 'Background recomputations by trigger and outcome', ['trigger', 'outcome']
+)
+
+
+class PrecomputeScheduler:
+    """
+    Recompute a result on an interval or when the underlying data changes.
+    
+    A single asyncio task probes the data version every probe_interval
+    seconds. A change (or a notify() call, e.g. from a write webhook)
+    marks the result dirty; the recomputation then waits until no further
+    change has been seen for debounce seconds, so a burst of attendance
+    writes costs one recomputation, but never longer than max_delay after
+    the first change. Without changes the result is still recomputed
+    every interval seconds.
+    
+    Blocking work (probe and compute) goes through run, typically the
+    application's thread pool, so the event loop never blocks.
+    """
+    
+    def __init__(self, compute: Callable[[], Tuple[Any, Any]], probe: Callable[[], Any],
+                 run: Callable[..., Awaitable], interval: float = 300.0, probe_interval: float = 5.0,
+                 debounce: float = 2.0, max_delay: float = 30.0, name: str = 'precompute'):
+        """
+        Create a scheduler (call start() from a running event loop).
+        
+        Args:
+            compute: Blocking callable returning (data_version, result)
+            probe: Blocking callable returning the current data version
+            run: Coroutine function running a blocking callable off the loop
+            interval: Seconds between unconditional recomputations
+            probe_interval: Seconds between data version probes
+            debounce: Quiet seconds required after the last change
+            max_delay: Longest wait after the first unprocessed change
+            name: Label used in logs and metrics
+        """
+        self.compute = compute
+        self.probe = probe
+        self.run = run
+        self.interval = interval
+        self.probe_interval = probe_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.name = name
+        
+        self.result = None
+        self.data_version = None
+        self.computed_at: Optional[datetime] = None
+        self._computed_monotonic = float('-inf')
+        self._probed_version = None
+        self._dirty_since: Optional[float] = None
+        self._last_change: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+    
+    @property
+    def running(self) -> bool:
+        """Whether the background task is active"""
+        return self._task is not None and not self._task.done()
+    
+    @property
+    def stale(self) -> bool:
+        """Whether a change is known that the current result does not include"""
+        return self._dirty_since is not None
+    
+    def start(self) -> None:
+        """Start the background task on the running event loop"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=self.name)
+    
+    async def stop(self) -> None:
+        """Cancel the background task and wait for it to finish"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def notify(self) -> None:
+        """Report a data change; the result is recomputed once changes settle"""
+        self._mark_changed(time.monotonic())
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    async def get(self) -> Any:
+        """Get the last completed result, computing it first if there is none yet"""
+        if self.result is None:
+            async with self._get_lock():
+                if self.result is None:
+                    await self._recompute('initial')
+        return self.result
+    
+    def status(self) -> Dict:
+        """Describe how fresh the current result is"""
+        return {
+            'computed_at': self.computed_at.isoformat() if self.computed_at is not None else None,
+            'age_seconds': round(time.monotonic() - self._computed_monotonic, 3) if self.computed_at is not None else None,
+            'stale': self.stale
+        }
+    
+    async def refresh(self, trigger: str = 'manual') -> None:
+        """
+        Recompute the result now.
+        
+        Concurrent callers share one computation: whoever waits on the lock
+        while another refresh runs returns once it completes, unless a new
+        change arrived in the meantime.
+        """
+        requested = time.monotonic()
+        async with self._get_lock():
+            if self._computed_monotonic >= requested and not self.stale:
+                return
+            await self._recompute(trigger)
+    
+    def _get_lock(self) -> asyncio.Lock:
+        """Lock serializing computations (created on the running loop)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+    
+    async def _recompute(self, trigger: str) -> None:
+        """Run one computation and publish its result (caller holds the lock)"""
+        started = time.monotonic()
+        dirty_since, self._dirty_since, self._last_change = self._dirty_since, None, None
+        try:
+            data_version, result = await self.run(self.compute)
+        except Exception:
+            # Keep serving the previous result and retry on a later tick
+            if self._dirty_since is None:
+                self._dirty_since, self._last_change = dirty_since or started, started
+            PRECOMPUTE_RUNS.inc(trigger=trigger, outcome='error')
+            raise
+        
+        self.result = result
+        self.data_version = self._probed_version = data_version
+        self.computed_at = datetime.now()
+        self._computed_monotonic = started
+        PRECOMPUTE_RUNS.inc(trigger=trigger, outcome='success')
+    
+    def _mark_changed(self, now: float) -> None:
+        """Record a change for debouncing"""
+        if self._dirty_since is None:
+            self._dirty_since = now
+        self._last_change = now
+    
+    def _due(self, now: float) -> Optional[str]:
+        """Get the trigger of a recomputation that is due now, if any"""
+        if self._dirty_since is not None:
+            if now - self._last_change >= self.debounce or now - self._dirty_since >= self.max_delay:
+                return 'change'
+            return None
+        if now - self._computed_monotonic >= self.interval:
+            return 'interval'
+        return None
+    
+    def _next_wait(self, now: float) -> float:
+        """Seconds until the next probe or debounce deadline"""
+        wait = self.probe_interval
+        if self._dirty_since is not None:
+            deadline = min(self._last_change + self.debounce, self._dirty_since + self.max_delay)
+            wait = min(wait, deadline - now)
+        else:
+            wait = min(wait, self._computed_monotonic + self.interval - now)
+        return max(wait, 0.0)
+    
+    async def _tick(self) -> None:
+        """Probe for changes and recompute when due"""
+        version = await self.run(self.probe)
+        now = time.monotonic()
+        if self.result is not None and version != self._probed_version:
+            self._mark_changed(now)
+        self._probed_version = version
+        
+        if self.result is None:
+            await self.get()
+        else:
+            trigger = self._due(now)
+            if trigger is not None:
+                await self.refresh(trigger)
+    
+    async def _run(self) -> None:
+        """Background loop"""
+        while True:
+            wait = None
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'{self.name}: background recomputation failed: {str(e)}')
+                wait = self.probe_interval
+            
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=wait if wait is not None else self._next_wait(time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
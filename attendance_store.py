@@ -0,0 +1,360 @@
+"""
+Attendance Store - Attendance Analysis System
+
+Compact columnar representation of the attendance records held in memory
+by the analyzer. Generic DataFrames repeat the student UUID as a Python
+string in every row; the store keeps one NumPy array per column instead:
+
+- student: int32 code into a sorted table of interned student UUIDs
+- day: int32 days since 1970-01-01
+- status: uint8 index into ATTENDANCE_STATUSES (the migration's enum)
+- hours: float32 hours rendered
+- ids: attendance UUIDs as fixed-width ASCII bytes
+- time_in, time_out: int16 minutes after midnight (MISSING_TIME if null)
+
+Records are always sorted by (student, day), so a student's records are
+one contiguous, date-ordered slice.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from attendance_sources import LazyModule
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = LazyModule('numpy')
+    pd = LazyModule('pandas')
+
+# Attendance statuses (mirrors the enum on the attendances table); the
+# position of a status is its uint8 code in the store
+ATTENDANCE_STATUSES = ['present', 'late', 'absent', 'half_day', 'holiday']
+
+# Status code of values outside ATTENDANCE_STATUSES
+UNKNOWN_STATUS = 255
+
+# Minutes in a day, and the time code of a null or unparseable time
+MINUTES_PER_DAY = 24 * 60
+MISSING_TIME = -1
+
+
+def encode_ids(values) -> np.ndarray:
+    """
+    Encode string keys as a fixed-width bytes array.
+    
+    UUIDs take 36 bytes this way instead of a pointer plus a Python string
+    object per row. Keys that are not ASCII are kept as objects.
+    """
+    values = np.asarray(values, dtype=object)
+    if len(values) == 0:
+        return np.empty(0, dtype='S36')
+    try:
+        return values.astype('S')
+    except (UnicodeEncodeError, TypeError):
+        return values
+
+
+def encode_days(dates) -> np.ndarray:
+    """Convert dates to int32 days since 1970-01-01"""
+    dates = pd.Series(dates)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    return dates.to_numpy(dtype='datetime64[D]').astype(np.int32)
+
+
+def _time_minutes(value) -> int:
+    """Minutes after midnight of one TIME value (MISSING_TIME if null or invalid)"""
+    if isinstance(value, str):
+        try:
+            hours, minutes = value.split(':')[:2]
+            return (int(hours) * 60 + int(minutes)) % MINUTES_PER_DAY
+        except ValueError:
+            return MISSING_TIME
+    if hasattr(value, 'total_seconds'):  # MySQL TIME columns arrive as timedeltas
+        return int(value.total_seconds() // 60) % MINUTES_PER_DAY if not pd.isna(value) else MISSING_TIME
+    if hasattr(value, 'hour'):
+        return value.hour * 60 + value.minute
+    return MISSING_TIME
+
+
+def encode_times(values) -> np.ndarray:
+    """
+    Convert times of day to int16 minutes after midnight.
+    
+    Accepts 'HH:MM[:SS]' strings, datetime.time values or timedeltas, as
+    returned by the different drivers for a TIME column. Recorded times
+    repeat heavily, so only the distinct values are parsed.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_timedelta64_dtype(values):
+        minutes = values.to_numpy(dtype='timedelta64[m]')
+        return np.where(values.isna(), MISSING_TIME, minutes.astype(np.int64) % MINUTES_PER_DAY).astype(np.int16)
+    codes, uniques = pd.factorize(values)
+    table = np.array([_time_minutes(value) for value in uniques] + [MISSING_TIME], dtype=np.int16)
+    return table[codes]
+
+
+def decode_times(minutes: np.ndarray) -> pd.TimedeltaIndex:
+    """Convert time codes back to timedeltas since midnight (NaT if missing)"""
+    minutes = np.asarray(minutes)
+    return pd.to_timedelta(np.where(minutes == MISSING_TIME, np.nan, minutes), unit='m')
+
+
+def encode_day(value) -> int:
+    """Convert one date or timestamp to its day number"""
+    return int(pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+def lookup_codes(table: np.ndarray, values) -> np.ndarray:
+    """Positions of values in a sorted table (-1 for values not in it)"""
+    values = np.asarray(list(values) if not isinstance(values, np.ndarray) else values, dtype=object)
+    if len(table) == 0 or len(values) == 0:
+        return np.full(len(values), -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(table, values), len(table) - 1)
+    return np.where(table[positions] == values, positions, -1)
+
+
+def decode_days(days: np.ndarray) -> pd.DatetimeIndex:
+    """Convert day numbers back to midnight timestamps"""
+    return pd.DatetimeIndex(np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype('datetime64[us]'))
+
+
+class AttendanceStore:
+    """
+    Immutable columnar attendance records sorted by (student, day).
+    
+    Selecting records (student_records(), students_records(), select(),
+    between()) returns a new store sharing the interned student table; a
+    single student's records are NumPy views, not copies.
+    """
+    
+    def __init__(self, student_ids: np.ndarray, student: np.ndarray, day: np.ndarray,
+                 status: np.ndarray, hours: np.ndarray, ids: Optional[np.ndarray] = None,
+                 time_in: Optional[np.ndarray] = None, time_out: Optional[np.ndarray] = None):
+        """
+        Wrap already encoded, already sorted columns.
+        
+        Args:
+            student_ids: Sorted unique student UUIDs (object array)
+            student: int32 codes into student_ids
+            day: int32 day numbers
+            status: uint8 status codes
+            hours: float32 hours rendered
+            ids: Encoded attendance UUIDs (None if not loaded)
+            time_in: int16 time-in minutes (None if not loaded)
+            time_out: int16 time-out minutes (None if not loaded)
+        """
+        self.student_ids = student_ids
+        self.student = student
+        self.day = day
+        self.status = status
+        self.hours = hours
+        self.ids = ids
+        self.time_in = time_in
+        self.time_out = time_out
+        self._offsets = None
+    
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, student_ids=None) -> 'AttendanceStore':
+        """
+        Encode an attendances frame (as returned by read_attendances).
+        
+        Args:
+            frame: Frame with student_id, date, status, hours_rendered and
+                optionally id, time_in and time_out columns, in any row order
+            student_ids: Extra student UUIDs to intern (e.g. every student,
+                including those without records)
+        """
+        # Intern student UUIDs: hash-factorize, then renumber in sorted order
+        codes, uniques = pd.factorize(frame['student_id'])
+        uniques = np.asarray(uniques, dtype=object)
+        if student_ids is None:
+            table = np.sort(uniques)
+        else:
+            table = np.union1d(uniques, np.asarray(student_ids, dtype=object))
+        student = (np.searchsorted(table, uniques)[codes] if len(uniques) else codes).astype(np.int32)
+        
+        status = frame['status']
+        if not (isinstance(status.dtype, pd.CategoricalDtype) and list(status.cat.categories) == ATTENDANCE_STATUSES):
+            status = status.astype(object).astype(pd.CategoricalDtype(ATTENDANCE_STATUSES))
+        status_codes = status.cat.codes.to_numpy()
+        status_codes = np.where(status_codes < 0, UNKNOWN_STATUS, status_codes).astype(np.uint8)
+        
+        day = encode_days(frame['date'])
+        order = np.lexsort((day, student))
+        return cls(
+            table,
+            student[order],
+            day[order],
+            status_codes[order],
+            frame['hours_rendered'].to_numpy(dtype=np.float32)[order],
+            encode_ids(frame['id'].to_numpy(dtype=object)[order]) if 'id' in frame.columns else None,
+            encode_times(frame['time_in'])[order] if 'time_in' in frame.columns else None,
+            encode_times(frame['time_out'])[order] if 'time_out' in frame.columns else None
+        )
+    
+    def __len__(self) -> int:
+        return len(self.student)
+    
+    @property
+    def empty(self) -> bool:
+        return len(self.student) == 0
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the per-record arrays"""
+        arrays = [self.student, self.day, self.status, self.hours]
+        if self.ids is not None and self.ids.dtype != object:
+            arrays.append(self.ids)
+        arrays.extend(times for times in (self.time_in, self.time_out) if times is not None)
+        return sum(array.nbytes for array in arrays)
+    
+    @property
+    def offsets(self) -> np.ndarray:
+        """Record offsets per student code: code k owns [offsets[k], offsets[k + 1])"""
+        if self._offsets is None:
+            self._offsets = np.searchsorted(self.student, np.arange(len(self.student_ids) + 1))
+        return self._offsets
+    
+    def code(self, student_id: str) -> int:
+        """Get the code of a student UUID (-1 if not interned)"""
+        position = int(np.searchsorted(self.student_ids, student_id))
+        if position < len(self.student_ids) and self.student_ids[position] == student_id:
+            return position
+        return -1
+    
+    def codes(self, student_ids) -> np.ndarray:
+        """Get the codes of several student UUIDs (-1 for those not interned)"""
+        return lookup_codes(self.student_ids, student_ids)
+    
+    def _subset(self, index) -> 'AttendanceStore':
+        """Store of the records selected by a slice, mask or sorted positions"""
+        return AttendanceStore(
+            self.student_ids, self.student[index], self.day[index], self.status[index],
+            self.hours[index], self.ids[index] if self.ids is not None else None,
+            self.time_in[index] if self.time_in is not None else None,
+            self.time_out[index] if self.time_out is not None else None
+        )
+    
+    def student_records(self, student_id: str) -> 'AttendanceStore':
+        """Get one student's records, ordered by day (a view)"""
+        code = self.code(student_id)
+        if code < 0:
+            return self._subset(slice(0, 0))
+        offsets = self.offsets
+        return self._subset(slice(offsets[code], offsets[code + 1]))
+    
+    def students_records(self, student_ids) -> 'AttendanceStore':
+        """Get the records of several students, still sorted by (student, day)"""
+        codes = np.unique(self.codes(student_ids))
+        codes = codes[codes >= 0]
+        offsets = self.offsets
+        if len(codes) == 0:
+            return self._subset(slice(0, 0))
+        positions = np.concatenate([np.arange(offsets[code], offsets[code + 1]) for code in codes.tolist()])
+        return self._subset(positions)
+    
+    def select(self, mask: np.ndarray) -> 'AttendanceStore':
+        """Get the records where mask is true"""
+        return self._subset(mask)
+    
+    def between(self, start=None, end=None) -> 'AttendanceStore':
+        """Get the records dated within [start, end] (None for an open bound)"""
+        if start is None and end is None:
+            return self
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.day >= encode_day(start)
+        if end is not None:
+            mask &= self.day <= encode_day(end)
+        return self._subset(mask)
+    
+    def student_uuids(self) -> np.ndarray:
+        """Student UUID of every record (object array)"""
+        return self.student_ids[self.student]
+    
+    def status_names(self) -> np.ndarray:
+        """Status name of every record (object array, None for unknown)"""
+        names = np.array(ATTENDANCE_STATUSES + [None] * (256 - len(ATTENDANCE_STATUSES)), dtype=object)
+        return names[self.status]
+    
+    def status_counts(self) -> Dict[str, int]:
+        """Count records per known status (zero counts included)"""
+        counts = np.bincount(self.status, minlength=256)[:len(ATTENDANCE_STATUSES)]
+        return {name: int(count) for name, count in zip(ATTENDANCE_STATUSES, counts)}
+    
+    def status_is(self, *names: str) -> np.ndarray:
+        """Mask of records whose status is one of names"""
+        return np.isin(self.status, [ATTENDANCE_STATUSES.index(name) for name in names])
+    
+    def keys(self, student_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode (student, day) pairs as int64 keys.
+        
+        Args:
+            student_ids: Intern table to code students against (default:
+                this store's); students missing from it get code -1
+        """
+        student = self.student.astype(np.int64)
+        if student_ids is not None and student_ids is not self.student_ids:
+            student = lookup_codes(student_ids, self.student_ids)[student] if len(self) else student
+        return (student << 32) | (self.day.astype(np.int64) & 0xFFFFFFFF)
+    
+    def to_frame(self) -> pd.DataFrame:
+        """Decode into a frame like read_attendances returns"""
+        columns = {}
+        if self.ids is not None:
+            columns['id'] = (
+                np.char.decode(self.ids, 'ascii').astype(object) if self.ids.dtype != object else self.ids
+            )
+        columns.update({
+            'student_id': self.student_uuids(),
+            'date': decode_days(self.day),
+            **{
+                name: decode_times(times)
+                for name, times in (('time_in', self.time_in), ('time_out', self.time_out))
+                if times is not None
+            },
+            'status': pd.Categorical.from_codes(
+                np.where(self.status == UNKNOWN_STATUS, -1, self.status).astype(np.int8), ATTENDANCE_STATUSES
+            ),
+            'hours_rendered': self.hours,
+        })
+        return pd.DataFrame(columns)
+    
+    @classmethod
+    def concat(cls, stores: Tuple['AttendanceStore', ...]) -> 'AttendanceStore':
+        """
+        Combine stores into one, re-interning students and re-sorting.
+        
+        Optional columns (ids, times) are kept only if every store has them.
+        """
+        table = stores[0].student_ids
+        for store in stores[1:]:
+            if store.student_ids is not table:
+                table = np.union1d(table, store.student_ids)
+        
+        student = np.concatenate([
+            np.searchsorted(table, store.student_ids)[store.student] if len(store) else store.student
+            for store in stores
+        ]).astype(np.int32)
+        day = np.concatenate([store.day for store in stores])
+        order = np.lexsort((day, student))
+        
+        def optional(name):
+            arrays = [getattr(store, name) for store in stores if getattr(store, name) is not None]
+            return np.concatenate(arrays)[order] if len(arrays) == len(stores) else None
+        
+        return cls(
+            table,
+            student[order],
+            day[order],
+            np.concatenate([store.status for store in stores])[order],
+            np.concatenate([store.hours for store in stores])[order],
+            optional('ids'),
+            optional('time_in'),
+            optional('time_out')
+        )
@@ -0,0 +1,423 @@
+"""
+Benchmark Harness - Attendance Analysis System
+
+Generates a synthetic dataset shaped like the Laravel `students` and
+`attendances` migrations, loads it into SQLite (a file or in memory) or
+Parquet files and times the analyzer and the API endpoints against it. Reports latency
+percentiles and peak memory per case, and exits non-zero when a case
+regresses past a threshold relative to a saved baseline.
+
+Run it without MySQL:
+    python benchmark_analysis.py --rows 100000 --output baseline.json
+    python benchmark_analysis.py --rows 100000 --baseline baseline.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from attendance_analysis import ATTENDANCE_STATUSES, AttendanceAnalyzer
+from attendance_sources import DataSource, ParquetDataSource, SQLiteDataSource, export_tables
+
+# Shift schedules as (shift_start, shift_end) in minutes after midnight;
+# Evening shifts cross midnight, as the Laravel controllers allow
+SHIFTS = {
+    'Morning': (8 * 60, 17 * 60),
+    'Afternoon': (13 * 60, 22 * 60),
+    'Evening': (22 * 60, 7 * 60),
+}
+
+# Population-level status mix; each student draws their own from a
+# Dirichlet around it, so the cohort spans every risk level
+STATUS_WEIGHTS = [12.0, 3.0, 1.5, 1.0, 0.5]
+
+REQUIRED_HOURS = [240, 300, 486, 600]
+
+SCHEMA = [
+    """CREATE TABLE students (
+        id CHAR(36) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        profile_picture TEXT NULL,
+        required_hours INTEGER NOT NULL,
+        shift_start TIME NULL,
+        shift_end TIME NULL,
+        shift_name VARCHAR(10) NULL,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        created_at TIMESTAMP NULL,
+        updated_at TIMESTAMP NULL
+    )""",
+    """CREATE TABLE attendances (
+        id CHAR(36) PRIMARY KEY,
+        student_id CHAR(36) NOT NULL REFERENCES students (id) ON DELETE CASCADE,
+        date DATE NOT NULL,
+        time_in TIME NULL,
+        time_out TIME NULL,
+        status VARCHAR(10) NOT NULL,
+        hours_rendered DECIMAL(5, 2) NOT NULL DEFAULT 0,
+        created_at TIMESTAMP NULL,
+        updated_at TIMESTAMP NULL,
+        UNIQUE (student_id, date)
+    )""",
+]
+
+
+def _uuids(rng: np.random.Generator, count: int) -> List[str]:
+    """Draw reproducible version-4 UUID strings"""
+    raw = rng.bytes(16 * count)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
+def _clock(minutes: np.ndarray) -> np.ndarray:
+    """Format minutes after midnight as HH:MM:SS strings"""
+    minutes = minutes % (24 * 60)
+    hours = np.char.zfill((minutes // 60).astype(str), 2)
+    mins = np.char.zfill((minutes % 60).astype(str), 2)
+    return np.char.add(np.char.add(np.char.add(hours, ':'), mins), ':00').astype(object)
+
+
+def generate_dataset(rows: int = 100000, days: int = 60,
+                     seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Generate students and attendances matching the Laravel migrations.
+    
+    Each student gets `days` consecutive weekday records from a staggered
+    start date. Statuses, late arrivals, half days and hours_rendered
+    follow the rules of AttendanceController (late when time_in is after
+    shift_start, one hour lunch deducted, half days count 4 hours).
+    
+    Args:
+        rows: Number of attendance records to generate
+        days: Attendance records per student
+        seed: Random seed; the same arguments always give the same data
+    
+    Returns:
+        Tuple of (students_df, attendances_df)
+    """
+    rng = np.random.default_rng(seed)
+    n_students = max(1, -(-rows // days))
+    
+    shift_names = rng.choice(list(SHIFTS), n_students)
+    shift_start = np.array([SHIFTS[name][0] for name in shift_names])
+    shift_end = np.array([SHIFTS[name][1] for name in shift_names])
+    start_dates = pd.Timestamp('2026-01-05') + pd.to_timedelta(rng.integers(0, 60, n_students), unit='D')
+    required_hours = rng.choice(REQUIRED_HOURS, n_students)
+    timestamp = '2026-01-05 08:00:00'
+    
+    students = pd.DataFrame({
+        'id': _uuids(rng, n_students),
+        'name': [f'Student {i + 1}' for i in range(n_students)],
+        'profile_picture': None,
+        'required_hours': required_hours,
+        'shift_start': _clock(shift_start),
+        'shift_end': _clock(shift_end),
+        'shift_name': shift_names,
+        'start_date': start_dates.strftime('%Y-%m-%d'),
+        'end_date': (start_dates + pd.to_timedelta(required_hours // 8 * 7 // 5 + 14, unit='D')).strftime('%Y-%m-%d'),
+        'created_at': timestamp,
+        'updated_at': timestamp,
+    })
+    
+    # One block of `days` weekday records per student, trimmed to `rows`
+    owner = np.repeat(np.arange(n_students), days)[:rows]
+    offset = np.tile(np.arange(days), n_students)[:rows]
+    dates = pd.DatetimeIndex(np.busday_offset(
+        start_dates.to_numpy().astype('datetime64[D]')[owner], offset, roll='forward'
+    ))
+    
+    # Sample each record's status from its student's own mix
+    mix = rng.dirichlet(STATUS_WEIGHTS, n_students).cumsum(axis=1)
+    draws = rng.random(len(owner))
+    status_codes = np.minimum((draws[:, None] > mix[owner]).sum(axis=1), len(ATTENDANCE_STATUSES) - 1)
+    status = np.array(ATTENDANCE_STATUSES, dtype=object)[status_codes]
+    
+    start = shift_start[owner]
+    end = shift_end[owner] + np.where(shift_end[owner] < start, 24 * 60, 0)
+    time_in = np.select(
+        [status == 'late', status == 'half_day'],
+        [start + rng.integers(1, 90, len(owner)), start + rng.integers(-10, 10, len(owner))],
+        default=start - rng.integers(0, 15, len(owner))
+    )
+    time_out = np.where(status == 'half_day', time_in + 4 * 60, end + rng.integers(-10, 30, len(owner)))
+    worked = (status == 'present') | (status == 'late')
+    attended = worked | (status == 'half_day')
+    
+    hours = np.select(
+        [worked, status == 'half_day'],
+        [np.maximum((time_out - time_in) / 60 - 1, 0), 4.0],
+        default=0.0
+    )
+    updated_at = (dates + pd.Timedelta(hours=18)).strftime('%Y-%m-%d %H:%M:%S')
+    
+    attendances = pd.DataFrame({
+        'id': _uuids(rng, len(owner)),
+        'student_id': students['id'].to_numpy()[owner],
+        'date': dates.strftime('%Y-%m-%d'),
+        'time_in': np.where(attended, _clock(time_in), None),
+        'time_out': np.where(attended, _clock(time_out), None),
+        'status': status,
+        'hours_rendered': np.round(hours, 2),
+        'created_at': updated_at,
+        'updated_at': updated_at,
+    })
+    return students, attendances
+
+
+def load_sqlite(students: pd.DataFrame, attendances: pd.DataFrame,
+                path: Optional[str] = None) -> SQLiteDataSource:
+    """
+    Load a generated dataset into SQLite.
+    
+    Args:
+        students: Students frame from generate_dataset
+        attendances: Attendances frame from generate_dataset
+        path: Database file (None for an in-memory database)
+    
+    Returns:
+        SQLiteDataSource for the loaded database
+    """
+    if path is not None and os.path.exists(path):
+        os.remove(path)
+    source = SQLiteDataSource(path or ':memory:')
+    
+    with source.engine.begin() as connection:
+        for statement in SCHEMA:
+            connection.exec_driver_sql(statement)
+        students.to_sql('students', connection, if_exists='append', index=False, chunksize=10000)
+        attendances.to_sql('attendances', connection, if_exists='append', index=False, chunksize=10000)
+    return source
+
+
+def measure(func: Callable, repeat: int, warmup: int = 1) -> Dict:
+    """
+    Time repeated calls and measure the peak memory of one more.
+    
+    Peak memory is traced with tracemalloc on a separate call, so tracing
+    overhead does not distort the timings.
+    
+    Returns:
+        Dictionary of latency percentiles (ms) and peak traced memory (MB)
+    """
+    for _ in range(warmup):
+        func()
+    
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    p50, p90, p95, p99 = np.percentile(timings, [50, 90, 95, 99]).tolist()
+    return {
+        'calls': repeat,
+        'mean_ms': round(float(np.mean(timings)), 3),
+        'p50_ms': round(p50, 3),
+        'p90_ms': round(p90, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'max_ms': round(max(timings), 3),
+        'peak_mb': round(peak / 2 ** 20, 2),
+    }
+
+
+def analyzer_cases(analyzer: AttendanceAnalyzer, student_ids: List[str]) -> Dict[str, Callable]:
+    """Analyzer calls to benchmark, keyed by case name"""
+    students = itertools.cycle(student_ids)
+    return {
+        'load_snapshot': lambda: analyzer.get_snapshot(force=True),
+        'get_student_analysis': lambda: analyzer.get_student_analysis(next(students)),
+        'get_all_students_analysis': analyzer.get_all_students_analysis,
+        'get_risk_summary': analyzer.get_risk_summary,
+        'get_statistics': analyzer.get_statistics,
+    }
+
+
+def api_cases(client, student_ids: List[str]) -> Dict[str, Callable]:
+    """API requests to benchmark, keyed by case name"""
+    students = itertools.cycle(student_ids)
+    
+    def get(path_factory):
+        def call():
+            response = client.get(path_factory())
+            response.raise_for_status()
+        return call
+    
+    return {
+        'api_student_analysis': get(lambda: f'/api/students/{next(students)}/analysis'),
+        'api_risk_summary': get(lambda: '/api/risk-summary'),
+        'api_all_students_page': get(lambda: '/api/students/analysis/all?limit=100'),
+        'api_statistics': get(lambda: '/api/statistics'),
+    }
+
+
+def run_benchmarks(source: DataSource, repeat: int = 20, warmup: int = 1,
+                   include_api: bool = True, workers: int = 0) -> Dict[str, Dict]:
+    """
+    Run every benchmark case against a loaded database.
+    
+    Args:
+        source: Data source holding a generated dataset
+        repeat: Timed calls per case
+        warmup: Untimed calls before timing each case
+        include_api: Also benchmark the FastAPI endpoints
+        workers: Parallel analysis worker processes (0: serial)
+    
+    Returns:
+        Measurements keyed by case name
+    """
+    analyzer = AttendanceAnalyzer(source=source, parallel_workers=workers)
+    students_df, attendances_df = analyzer.load_data()
+    
+    # Only students with enough records get a full (non-error) analysis
+    counts = attendances_df['student_id'].value_counts()
+    student_ids = counts[counts >= 10].index.tolist()[:200] or students_df['id'].tolist()[:200]
+    
+    results = {}
+    for name, func in analyzer_cases(analyzer, student_ids).items():
+        # Full reloads are slow and steady; fewer calls are enough
+        calls = max(3, repeat // 4) if name == 'load_snapshot' else repeat
+        results[name] = measure(func, calls, warmup)
+        print(f'  {name}: p50 {results[name]["p50_ms"]} ms', file=sys.stderr)
+    analyzer.close()
+    
+    if include_api:
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError as e:  # TestClient needs httpx
+            print(f'  skipping API benchmarks: {e}', file=sys.stderr)
+            return results
+        
+        import attendance_api
+        logging.getLogger('httpx').setLevel(logging.WARNING)
+        attendance_api.analyzer = AttendanceAnalyzer(source=source, parallel_workers=workers)
+        with TestClient(attendance_api.app) as client:
+            for name, func in api_cases(client, student_ids).items():
+                results[name] = measure(func, repeat, warmup)
+                print(f'  {name}: p50 {results[name]["p50_ms"]} ms', file=sys.stderr)
+    
+    return results
+
+
+def find_regressions(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                     threshold: float, metric: str = 'p50_ms') -> List[str]:
+    """
+    Compare results with a baseline run.
+    
+    Args:
+        results: Measurements from run_benchmarks
+        baseline: Measurements from an earlier run
+        threshold: Allowed relative slowdown (0.25 = 25%)
+        metric: Measurement to compare
+    
+    Returns:
+        Descriptions of the cases that regressed past the threshold
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get(metric):
+            continue
+        change = current[metric] / previous[metric] - 1
+        if change > threshold:
+            regressions.append(
+                f'{name}: {metric} {previous[metric]} -> {current[metric]} (+{change:.0%})'
+            )
+    return regressions
+
+
+def print_report(results: Dict[str, Dict]) -> None:
+    """Print the measurements as a table"""
+    columns = ['calls', 'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms', 'peak_mb']
+    width = max(len(name) for name in results)
+    print(f'{"case":<{width}}  ' + '  '.join(f'{column:>9}' for column in columns))
+    for name, measurement in results.items():
+        print(f'{name:<{width}}  ' + '  '.join(f'{measurement[column]:>9}' for column in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line"""
+    parser = argparse.ArgumentParser(description='Benchmark the attendance analyzer on synthetic data')
+    parser.add_argument('--rows', type=int, default=100000, help='Attendance records to generate (10k-1M)')
+    parser.add_argument('--days', type=int, default=60, help='Attendance records per student')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the generator')
+    parser.add_argument('--source', choices=['memory', 'sqlite', 'parquet'], default='memory',
+                        help='Load into an in-memory or file SQLite database, or Parquet files (needs pyarrow)')
+    parser.add_argument('--db-path', default=None,
+                        help='SQLite file for --source sqlite, or directory for --source parquet (default: in the temp dir)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed calls per case')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed calls per case')
+    parser.add_argument('--no-api', action='store_true', help='Skip the API endpoint benchmarks')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Analyze cohorts across this many worker processes (default 0: serial)')
+    parser.add_argument('--output', help='Write results as JSON (usable as a baseline)')
+    parser.add_argument('--baseline', help='Compare with a previous --output file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed p50 slowdown against the baseline before failing (default 0.25)')
+    args = parser.parse_args(argv)
+    
+    print(f'Generating {args.rows} attendance records...', file=sys.stderr)
+    students, attendances = generate_dataset(args.rows, args.days, args.seed)
+    
+    if args.source == 'parquet':
+        directory = args.db_path or os.path.join(tempfile.gettempdir(), 'attendance_benchmark')
+        export_tables(directory, students, attendances)
+        source = ParquetDataSource(directory)
+    elif args.source == 'sqlite':
+        source = load_sqlite(students, attendances, args.db_path or os.path.join(tempfile.gettempdir(), 'attendance_benchmark.db'))
+    else:
+        source = load_sqlite(students, attendances)
+    
+    print(f'Benchmarking {len(students)} students ({args.source})...', file=sys.stderr)
+    results = run_benchmarks(source, args.repeat, args.warmup, include_api=not args.no_api, workers=args.workers)
+    print_report(results)
+    
+    try:
+        import resource
+        print(f'\nProcess peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB')
+    except ImportError:  # resource is Unix-only
+        pass
+    
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({
+                'dataset': {'rows': args.rows, 'days': args.days, 'seed': args.seed, 'source': args.source,
+                            'workers': args.workers},
+                'results': results
+            }, handle, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline.get('dataset', {}).get('rows') != args.rows:
+            print('Warning: baseline was recorded with a different --rows', file=sys.stderr)
+        regressions = find_regressions(results, baseline.get('results', {}), args.threshold)
+        if regressions:
+            print(f'\nRegressions past {args.threshold:.0%}:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print(f'\nNo regressions past {args.threshold:.0%}')
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
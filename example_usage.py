@@ -24,11 +24,11 @@ def print_json(data, indent=2):
     print(json.dumps(data, indent=indent, default=str))
 
 
-def example_1_get_all_students_risk():
+def example_1_get_all_students_risk(analyzer=None):
     """Example 1: Get risk classification for all students"""
     print_section("Example 1: Risk Classification for All Students")
     
-    analyzer = AttendanceAnalyzer()
+    analyzer = analyzer or AttendanceAnalyzer()
     risk_summary = analyzer.get_risk_summary()
     
     print(f"\nTotal Students: {risk_summary['total_students']}")
@@ -43,11 +43,11 @@ def example_1_get_all_students_risk():
             print(f"  - {student['name']} ({student['attendance_rate']:.1f}% attendance)")
 
 
-def example_2_detailed_student_analysis(student_id=None):
+def example_2_detailed_student_analysis(student_id=None, analyzer=None):
     """Example 2: Get detailed analysis for a specific student"""
     print_section("Example 2: Detailed Student Analysis")
     
-    analyzer = AttendanceAnalyzer()
+    analyzer = analyzer or AttendanceAnalyzer()
     
     # If no student_id provided, get the first student
     if student_id is None:
@@ -106,11 +106,11 @@ def example_2_detailed_student_analysis(student_id=None):
         print(f"  {i}. {rec}")
 
 
-def example_3_identify_struggling_students():
+def example_3_identify_struggling_students(analyzer=None):
     """Example 3: Identify students who need intervention"""
     print_section("Example 3: Identify Struggling Students")
     
-    analyzer = AttendanceAnalyzer()
+    analyzer = analyzer or AttendanceAnalyzer()
     all_analysis = analyzer.get_all_students_analysis()
     
     # Filter students by risk level
@@ -134,11 +134,11 @@ def example_3_identify_struggling_students():
         print("  No students in critical level")
 
 
-def example_4_attendance_summary_only():
+def example_4_attendance_summary_only(analyzer=None):
     """Example 4: Get quick attendance summary (minimal data)"""
     print_section("Example 4: Quick Attendance Summary")
     
-    analyzer = AttendanceAnalyzer()
+    analyzer = analyzer or AttendanceAnalyzer()
     analyzer.load_data()
     
     if analyzer.students_df.empty:
@@ -160,11 +160,11 @@ def example_4_attendance_summary_only():
         print(f"   Pattern: {summary['pattern']}\n")
 
 
-def example_5_overall_statistics():
+def example_5_overall_statistics(analyzer=None):
     """Example 5: Get overall system statistics"""
     print_section("Example 5: Overall System Statistics")
     
-    analyzer = AttendanceAnalyzer()
+    analyzer = analyzer or AttendanceAnalyzer()
     analyzer.load_data()
     
     students_df = analyzer.students_df
@@ -183,11 +183,11 @@ def example_5_overall_statistics():
         print(f"  {status.upper()}: {count} records ({percentage:.1f}%)")
 
 
-def example_6_compare_students():
+def example_6_compare_students(analyzer=None):
     """Example 6: Compare attendance between students"""
     print_section("Example 6: Compare Student Performance")
     
-    analyzer = AttendanceAnalyzer()
+    analyzer = analyzer or AttendanceAnalyzer()
     all_analysis = analyzer.get_all_students_analysis()
     
     if len(all_analysis) < 2:
@@ -214,11 +214,11 @@ def example_6_compare_students():
               f"({student['risk_classification'].upper()})")
 
 
-def example_7_json_export():
+def example_7_json_export(analyzer=None):
     """Example 7: Export student analysis as JSON"""
     print_section("Example 7: Export Student Analysis (JSON)")
     
-    analyzer = AttendanceAnalyzer()
+    analyzer = analyzer or AttendanceAnalyzer()
     analyzer.load_data()
     
     if analyzer.students_df.empty:
@@ -238,15 +238,18 @@ def main():
     print("  ATTENDANCE ANALYSIS SYSTEM - USAGE EXAMPLES")
     print("🎓" * 40)
     
+    # One analyzer for every example, so the data is loaded only once
+    analyzer = AttendanceAnalyzer()
+    
     try:
         # Run examples
-        example_1_get_all_students_risk()
-        example_2_detailed_student_analysis()
-        example_3_identify_struggling_students()
-        example_4_attendance_summary_only()
-        example_5_overall_statistics()
-        example_6_compare_students()
-        example_7_json_export()
+        example_1_get_all_students_risk(analyzer)
+        example_2_detailed_student_analysis(analyzer=analyzer)
+        example_3_identify_struggling_students(analyzer)
+        example_4_attendance_summary_only(analyzer)
+        example_5_overall_statistics(analyzer)
+        example_6_compare_students(analyzer)
+        example_7_json_export(analyzer)
         
         print("\n" + "=" * 80)
         print(" ✅ All examples completed successfully!")
@@ -262,7 +265,7 @@ def main():
         print(f"\n❌ Error running examples: {str(e)}")
         print("\nTroubleshooting:")
         print("  - Ensure MySQL is running")
-        print("  - Verify database credentials in attendance_analysis.py")
+        print("  - Verify ANALYSIS_DATABASE_URL (or the default in attendance_analysis.py)")
         print("  - Check that students and attendance records exist in the database")
         print("  - Review error message above for specific issues\n")
 
@@ -5,6 +5,7 @@
 use App\Models\Student;
 use Carbon\Carbon;
 use Illuminate\Database\QueryException;
+use Illuminate\Support\Facades\Http;
 use Illuminate\Support\Facades\Log;
 
 
@@ -122,6 +123,7 @@ public function store(Request $request)
         // Handle potential database errors gracefully
         try{
             $attendance = Attendance::create(array_merge($validated, ['hours_rendered' => $hours_rendered])); // create attendance record with calculated hours
+            $this->notifyAnalysisService('created', $attendance);
             
             return response()->json([
                 'message' => 'attendance recorded successfully',
@@ -264,6 +266,7 @@ public function update(Request $request, Attendance $attendance)
         }
 
         $attendance->update($validated);
+        $this->notifyAnalysisService('updated', $attendance);
 
         return response()->json([
             'message' => 'Student attendance records updated successfully',
@@ -277,9 +280,43 @@ public function update(Request $request, Attendance $attendance)
     public function destroy(Attendance $attendance)
     {
         $attendance->delete();
+        $this->notifyAnalysisService('deleted', $attendance);
 
         return response()->json([
             'message' => 'Attendance record deleted successfully',
         ], 200);
     }
+
+    /**
+     * Tell the analysis API that attendance changed so it can refresh its precomputed results.
+     *
+     * The request is sent after the response has gone out, so a slow or
+     * unreachable analysis service never delays the attendance write.
+     */
+    private function notifyAnalysisService(string $event, Attendance $attendance): void
+    {
+        $url = config('services.analysis.webhook_url');
+
+        if (!$url) {
+            return;
+        }
+
+        $secret = (string) config('services.analysis.webhook_secret');
+        $payload = [
+            'event' => $event,
+            'attendance_id' => $attendance->id,
+            'student_id' => $attendance->student_id,
+        ];
+
+        dispatch(function () use ($url, $secret, $payload) {
+            try {
+                Http::timeout(2)->withHeaders([
+                    'X-Analysis-Secret' => $secret,
+                ])->post($url, $payload);
+            } catch (\Exception $e) {
+                // The analysis API still picks the change up on its next poll
+                Log::warning('Analysis webhook failed', ['event' => $payload['event'], 'error' => $e->getMessage()]);
+            }
+        })->afterResponse();
+    }
 }
@@ -28,6 +28,11 @@
         'region' => env('AWS_DEFAULT_REGION', 'us-east-1'),
     ],
 
+    'analysis' => [
+        'webhook_url' => env('ANALYSIS_WEBHOOK_URL'),
+        'webhook_secret' => env('ANALYSIS_WEBHOOK_SECRET'),
+    ],
+
     'slack' => [
         'notifications' => [
             'bot_user_oauth_token' => env('SLACK_BOT_USER_OAUTH_TOKEN'),
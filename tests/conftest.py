@@ -0,0 +1,63 @@
+"""
+Shared test fixtures.
+
+The repository root is put on sys.path so the top-level analysis modules
+are importable from the tests.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_sources import ParquetDataSource  # noqa: E402
+from attendance_store import ATTENDANCE_STATUSES  # noqa: E402
+from benchmark_analysis import generate_dataset  # noqa: E402
+
+# Students of the mixed dataset without a single attendance row
+STUDENTS_WITHOUT_RECORDS = 3
+
+# Records kept for the mixed dataset's student with too few of them
+SHORT_RECORDS = 4
+
+
+@pytest.fixture(scope='session')
+def mixed_dataset(tmp_path_factory):
+    """
+    A generated cohort with the edge cases of real data, as Parquet files.
+    
+    Covers every status, students without attendance rows, a student with
+    too few records to analyze, null hours_rendered (allowed by Parquet,
+    unlike the Laravel schema), partial hours and a student whose hours
+    are all null.
+    
+    Returns:
+        Tuple of (students_df, attendances_df, ParquetDataSource)
+    """
+    students, attendances = generate_dataset(rows=1200, days=20, seed=11)
+    
+    extra = students.head(STUDENTS_WITHOUT_RECORDS).copy()
+    extra['id'] = [f'ffffffff-0000-0000-0000-{i:012d}' for i in range(STUDENTS_WITHOUT_RECORDS)]
+    extra['name'] = [f'Student without records {i + 1}' for i in range(STUDENTS_WITHOUT_RECORDS)]
+    students = pd.concat([students, extra], ignore_index=True)
+    
+    # Too few records for a full analysis
+    short = attendances.index[attendances['student_id'] == students['id'].iloc[2]][SHORT_RECORDS:]
+    attendances = attendances.drop(short).reset_index(drop=True)
+    
+    hours = attendances['hours_rendered'].astype(object)
+    hours.iloc[::17] = None
+    hours.iloc[5::23] = 3.25
+    hours.iloc[9::29] = 0.5
+    hours[attendances['student_id'] == students['id'].iloc[1]] = None
+    attendances['hours_rendered'] = hours.astype(float)
+    
+    assert set(attendances['status']) == set(ATTENDANCE_STATUSES)
+    
+    directory = tmp_path_factory.mktemp('mixed')
+    students.to_parquet(directory / 'students.parquet', index=False)
+    attendances.to_parquet(directory / 'attendances.parquet', index=False)
+    return students, attendances, ParquetDataSource(str(directory))
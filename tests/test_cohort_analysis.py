@@ -0,0 +1,37 @@
+"""
+Cross-check of the vectorized cohort analysis against the per-student path.
+
+get_all_students_analysis must return exactly what get_student_analysis
+returns for every student, including students without records or with
+too few of them, every attendance status and null or partial hours.
+"""
+
+import pytest
+
+from attendance_analysis import AttendanceAnalyzer
+from conftest import SHORT_RECORDS, STUDENTS_WITHOUT_RECORDS
+
+
+@pytest.fixture
+def analyzer(mixed_dataset):
+    _, _, source = mixed_dataset
+    return AttendanceAnalyzer(source=source)
+
+
+def test_cohort_analysis_matches_per_student_path(mixed_dataset, analyzer):
+    students, _, _ = mixed_dataset
+    ids = sorted(students['id'].tolist())
+    
+    assert analyzer.get_all_students_analysis() == [analyzer.get_student_analysis(i) for i in ids]
+
+
+def test_mixed_dataset_covers_edge_cases(mixed_dataset, analyzer):
+    students, attendances, _ = mixed_dataset
+    ids = sorted(students['id'].tolist())
+    analyses = dict(zip(ids, analyzer.get_all_students_analysis()))
+    errors = [analysis['error'] for analysis in analyses.values() if 'error' in analysis]
+    
+    assert sum(' 0 days ' in error for error in errors) == STUDENTS_WITHOUT_RECORDS
+    assert sum(f' {SHORT_RECORDS} days ' in error for error in errors) == 1
+    assert attendances['hours_rendered'].isna().any()
+    assert analyses[students['id'].iloc[1]]['hours']['hours_rendered'] == 0
@@ -0,0 +1,50 @@
+"""
+Reconciliation of the incremental snapshot load.
+
+A delete paired with an insert carrying an older updated_at leaves the
+probe (row counts and MAX(updated_at)) unchanged; the periodic attendance
+ID diff must still pick it up.
+"""
+
+import pytest
+
+from attendance_analysis import AttendanceAnalyzer
+from benchmark_analysis import generate_dataset, load_sqlite
+
+
+@pytest.fixture
+def source():
+    students, attendances = generate_dataset(rows=600, days=20, seed=3)
+    return load_sqlite(students, attendances)
+
+
+def test_reconciliation_keeps_an_unchanged_snapshot(source):
+    analyzer = AttendanceAnalyzer(source=source, cache_ttl=0, reconcile_interval=0)
+    snapshot = analyzer.get_snapshot()
+    reconciliations = analyzer.reconciliations
+    
+    assert analyzer.get_snapshot() is snapshot
+    assert analyzer.reconciliations == reconciliations + 1
+
+
+def test_reconciliation_runs_behind_an_unchanged_probe(source):
+    analyzer = AttendanceAnalyzer(source=source, cache_ttl=0, reconcile_interval=0)
+    snapshot = analyzer.get_snapshot()
+    
+    with source.engine.begin() as connection:
+        attendance_id, student_id, updated_at = connection.exec_driver_sql(
+            'SELECT id, student_id, updated_at FROM attendances ORDER BY updated_at LIMIT 1'
+        ).fetchone()
+        connection.exec_driver_sql('DELETE FROM attendances WHERE id = ?', (attendance_id,))
+        connection.exec_driver_sql(
+            'INSERT INTO attendances (id, student_id, date, status, hours_rendered, created_at, updated_at) '
+            "VALUES ('aaaaaaaa-0000-0000-0000-000000000001', ?, '2020-01-01', 'absent', 0, ?, ?)",
+            (student_id, updated_at, updated_at)
+        )
+    assert analyzer._probe_data_version() == snapshot.data_version
+    
+    reconciled = analyzer.get_snapshot()
+    fresh = AttendanceAnalyzer(source=source)
+    assert reconciled.etag != snapshot.etag
+    assert sorted(reconciled.attendances_df['id']) == sorted(fresh.get_snapshot().attendances_df['id'])
+    assert analyzer.get_all_students_analysis() == fresh.get_all_students_analysis()
@@ -0,0 +1,73 @@
+"""
+Cross-checks of the SQL pushdown backend against the pandas path.
+
+Both backends must return identical summaries and statistics for the
+same data, with and without a time window.
+"""
+
+import pytest
+
+from attendance_analysis import AttendanceAnalyzer
+from benchmark_analysis import generate_dataset, load_sqlite
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    """A small generated cohort loaded into an in-memory SQLite database"""
+    students, attendances = generate_dataset(rows=3000, days=30, seed=7)
+    return students, attendances, load_sqlite(students, attendances)
+
+
+@pytest.fixture
+def analyzer(dataset):
+    _, _, source = dataset
+    return AttendanceAnalyzer(source=source)
+
+
+def test_student_summary_backends_agree(dataset, analyzer):
+    students, _, _ = dataset
+    for student_id in students['id'].tolist()[:25]:
+        assert (
+            analyzer.get_student_attendance_summary(student_id, backend='sql')
+            == analyzer.get_student_attendance_summary(student_id, backend='pandas')
+        )
+
+
+def test_student_summary_backends_agree_without_records(analyzer):
+    missing = '00000000-0000-0000-0000-000000000000'
+    assert (
+        analyzer.get_student_attendance_summary(missing, backend='sql')
+        == analyzer.get_student_attendance_summary(missing, backend='pandas')
+    )
+
+
+def test_statistics_backends_agree(analyzer):
+    assert analyzer.get_statistics(backend='sql') == analyzer.get_statistics(backend='pandas')
+
+
+@pytest.mark.parametrize('window', [
+    {'start_date': 'first', 'end_date': 'middle'},
+    {'start_date': 'middle'},
+    {'end_date': 'middle'},
+    {'last_days': 10, 'end_date': 'last'},
+    {'time_period': 'week', 'end_date': 'middle'},
+    {'time_period': 'month', 'end_date': 'last'},
+])
+def test_windowed_statistics_backends_agree(dataset, analyzer, window):
+    _, attendances, _ = dataset
+    dates = attendances['date'].astype('datetime64[ns]').sort_values()
+    anchors = {
+        'first': dates.iloc[0].date(),
+        'middle': dates.iloc[len(dates) // 2].date(),
+        'last': dates.iloc[-1].date(),
+    }
+    window = {key: anchors.get(value, value) for key, value in window.items()}
+    
+    sql = analyzer.get_statistics(backend='sql', **window)
+    assert sql == analyzer.get_statistics(backend='pandas', **window)
+    assert 0 < sql['total_attendance_records'] < len(attendances)
+
+
+def test_unknown_backend_is_rejected(analyzer):
+    with pytest.raises(ValueError):
+        analyzer.get_statistics(backend='spark')